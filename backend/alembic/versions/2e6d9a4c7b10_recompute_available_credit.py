@@ -0,0 +1,36 @@
+"""recompute_available_credit
+
+Revision ID: 2e6d9a4c7b10
+Revises: 8b3e5f0a2c71
+Create Date: 2026-10-18 21:04:52.390417
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '2e6d9a4c7b10'
+down_revision: Union[str, None] = '8b3e5f0a2c71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # available_credit used to be adjusted by deltas; reset it from dues
+    op.execute(
+        """
+        UPDATE user_balances
+        SET available_credit = (
+            SELECT CASE WHEN u.credit_limit - user_balances.dues > 0
+                        THEN u.credit_limit - user_balances.dues
+                        ELSE 0 END
+            FROM users u
+            WHERE u.id = user_balances.user_id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,31 @@
+"""rollup_gaps
+
+Revision ID: 3d9b6f1c8e25
+Revises: f2a7c09d4e18
+Create Date: 2026-10-18 19:02:47.215930
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '3d9b6f1c8e25'
+down_revision: Union[str, None] = 'f2a7c09d4e18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('rollup_gaps',
+    sa.Column('source', sa.String(length=50), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('seen_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('source', 'row_id')
+    )
+    op.create_index(op.f('ix_rollup_gaps_seen_at'), 'rollup_gaps', ['seen_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_rollup_gaps_seen_at'), table_name='rollup_gaps')
+    op.drop_table('rollup_gaps')
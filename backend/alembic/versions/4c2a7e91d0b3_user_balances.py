@@ -0,0 +1,61 @@
+"""user_balances
+
+Revision ID: 4c2a7e91d0b3
+Revises: 9ebbc1535681
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '4c2a7e91d0b3'
+down_revision: Union[str, None] = '9ebbc1535681'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_balances',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('dues', sa.Float(), nullable=False),
+    sa.Column('available_credit', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Backfill every user's running totals from the existing ledger history
+    op.execute(
+        """
+        INSERT INTO user_balances (user_id, dues, available_credit, updated_at)
+        SELECT b.user_id,
+               b.dues,
+               CASE WHEN b.credit_limit - b.dues > 0 THEN b.credit_limit - b.dues ELSE 0 END,
+               CURRENT_TIMESTAMP
+        FROM (
+            SELECT u.id AS user_id,
+                   u.credit_limit AS credit_limit,
+                   CASE WHEN COALESCE(t.spent, 0) - COALESCE(p.paid, 0) > 0
+                        THEN COALESCE(t.spent, 0) - COALESCE(p.paid, 0)
+                        ELSE 0 END AS dues
+            FROM users u
+            LEFT JOIN (
+                SELECT user_id, SUM(amount) AS spent
+                FROM transactions
+                WHERE status = 'success'
+                GROUP BY user_id
+            ) t ON t.user_id = u.id
+            LEFT JOIN (
+                SELECT user_id, SUM(amount) AS paid
+                FROM paybacks
+                GROUP BY user_id
+            ) p ON p.user_id = u.id
+        ) b
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_balances')
@@ -0,0 +1,42 @@
+"""ledger_created_at_not_null
+
+Revision ID: 4f8a2c6e1d93
+Revises: 7e4c2b9d1a60
+Create Date: 2026-10-18 20:02:41.913527
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '4f8a2c6e1d93'
+down_revision: Union[str, None] = '7e4c2b9d1a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LEDGER_TABLES = ('transactions', 'paybacks')
+
+
+def upgrade() -> None:
+    # b7f41c2d9a06 already made created_at NOT NULL on MySQL
+    if op.get_bind().dialect.name == 'mysql':
+        return
+    for table in LEDGER_TABLES:
+        op.execute(
+            f"UPDATE {table} SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL"
+        )
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('created_at',
+                   existing_type=sa.DateTime(),
+                   nullable=False)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'mysql':
+        return
+    for table in LEDGER_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('created_at',
+                   existing_type=sa.DateTime(),
+                   nullable=True)
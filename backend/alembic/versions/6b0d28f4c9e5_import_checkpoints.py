@@ -0,0 +1,29 @@
+"""import_checkpoints
+
+Revision ID: 6b0d28f4c9e5
+Revises: d5e93b0a47c1
+Create Date: 2026-10-18 13:48:52.604417
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '6b0d28f4c9e5'
+down_revision: Union[str, None] = 'd5e93b0a47c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('import_checkpoints',
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('lines_done', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('import_checkpoints')
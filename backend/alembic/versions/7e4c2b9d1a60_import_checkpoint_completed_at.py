@@ -0,0 +1,24 @@
+"""import_checkpoint_completed_at
+
+Revision ID: 7e4c2b9d1a60
+Revises: 3d9b6f1c8e25
+Create Date: 2026-10-18 19:21:05.448213
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '7e4c2b9d1a60'
+down_revision: Union[str, None] = '3d9b6f1c8e25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('import_checkpoints', sa.Column('completed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('import_checkpoints', 'completed_at')
@@ -0,0 +1,43 @@
+"""rollup_gap_ranges
+
+Revision ID: 8b3e5f0a2c71
+Revises: 4f8a2c6e1d93
+Create Date: 2026-10-18 20:31:17.604382
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '8b3e5f0a2c71'
+down_revision: Union[str, None] = '4f8a2c6e1d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Each tracked id becomes a one-id range
+    with op.batch_alter_table('rollup_gaps') as batch_op:
+        batch_op.alter_column('row_id',
+               new_column_name='first_id',
+               existing_type=sa.Integer(),
+               existing_nullable=False)
+        batch_op.add_column(sa.Column('last_id', sa.Integer(), nullable=True))
+    op.execute("UPDATE rollup_gaps SET last_id = first_id")
+    with op.batch_alter_table('rollup_gaps') as batch_op:
+        batch_op.alter_column('last_id',
+               existing_type=sa.Integer(),
+               nullable=False)
+
+
+def downgrade() -> None:
+    # Ranges longer than one id cannot be kept as single ids; their rows are
+    # left unfolded
+    op.execute("DELETE FROM rollup_gaps WHERE last_id > first_id")
+    with op.batch_alter_table('rollup_gaps') as batch_op:
+        batch_op.drop_column('last_id')
+        batch_op.alter_column('first_id',
+               new_column_name='row_id',
+               existing_type=sa.Integer(),
+               existing_nullable=False)
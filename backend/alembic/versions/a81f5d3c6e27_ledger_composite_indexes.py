@@ -0,0 +1,35 @@
+"""ledger_composite_indexes
+
+Revision ID: a81f5d3c6e27
+Revises: 4c2a7e91d0b3
+Create Date: 2026-10-18 10:02:17.540931
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a81f5d3c6e27'
+down_revision: Union[str, None] = '4c2a7e91d0b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Covering indexes for the dues/fee aggregates and the created_at-ordered lists
+    op.create_index('ix_transactions_user_status_amount', 'transactions', ['user_id', 'status', 'amount'], unique=False)
+    op.create_index('ix_transactions_merchant_status_fee', 'transactions', ['merchant_id', 'status', 'fee_amount'], unique=False)
+    op.create_index('ix_transactions_user_created_at', 'transactions', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_transactions_created_at', 'transactions', ['created_at', 'id'], unique=False)
+    op.create_index('ix_paybacks_user_amount', 'paybacks', ['user_id', 'amount'], unique=False)
+    op.create_index('ix_paybacks_user_created_at', 'paybacks', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_paybacks_user_created_at', table_name='paybacks')
+    op.drop_index('ix_paybacks_user_amount', table_name='paybacks')
+    op.drop_index('ix_transactions_created_at', table_name='transactions')
+    op.drop_index('ix_transactions_user_created_at', table_name='transactions')
+    op.drop_index('ix_transactions_merchant_status_fee', table_name='transactions')
+    op.drop_index('ix_transactions_user_status_amount', table_name='transactions')
@@ -0,0 +1,81 @@
+"""partition_ledger_by_month
+
+Revision ID: b7f41c2d9a06
+Revises: e3c7a915b8d2
+Create Date: 2026-10-18 16:05:12.402817
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b7f41c2d9a06'
+down_revision: Union[str, None] = 'e3c7a915b8d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONED_TABLES = ('transactions', 'paybacks')
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: datetime, n: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _partitions(first: datetime, last: datetime) -> str:
+    parts = []
+    month = datetime(first.year, first.month, 1)
+    while month <= last:
+        upper = _add_months(month, 1)
+        parts.append(
+            f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{upper:%Y-%m-%d}')"
+        )
+        month = upper
+    parts.append('PARTITION pfuture VALUES LESS THAN (MAXVALUE)')
+    return ', '.join(parts)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Only MySQL is partitioned; SQLite/dev databases keep plain tables
+    if bind.dialect.name != 'mysql':
+        return
+    now = datetime.utcnow()
+    last = _add_months(datetime(now.year, now.month, 1), MONTHS_AHEAD)
+    for table in PARTITIONED_TABLES:
+        # Partitioned InnoDB tables cannot have foreign keys, and every unique
+        # key must include the partitioning column
+        for fk in sa.inspect(bind).get_foreign_keys(table):
+            op.drop_constraint(fk['name'], table, type_='foreignkey')
+        op.execute(
+            f"UPDATE {table} SET created_at = UTC_TIMESTAMP() WHERE created_at IS NULL"
+        )
+        op.alter_column(table, 'created_at',
+               existing_type=sa.DateTime(),
+               nullable=False)
+        op.execute(
+            f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)"
+        )
+        first = bind.execute(sa.text(f"SELECT MIN(created_at) FROM {table}")).scalar()
+        op.execute(
+            f"ALTER TABLE {table} PARTITION BY RANGE COLUMNS(created_at) "
+            f"({_partitions(first or now, last)})"
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'mysql':
+        return
+    for table in PARTITIONED_TABLES:
+        op.execute(f"ALTER TABLE {table} REMOVE PARTITIONING")
+        op.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+        op.alter_column(table, 'created_at',
+               existing_type=sa.DateTime(),
+               nullable=True)
+    op.create_foreign_key(None, 'paybacks', 'users', ['user_id'], ['id'])
+    op.create_foreign_key(None, 'transactions', 'users', ['user_id'], ['id'])
+    op.create_foreign_key(None, 'transactions', 'merchants', ['merchant_id'], ['id'])
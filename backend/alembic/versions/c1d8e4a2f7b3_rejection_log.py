@@ -0,0 +1,43 @@
+"""rejection_log
+
+Revision ID: c1d8e4a2f7b3
+Revises: b7f41c2d9a06
+Create Date: 2026-10-18 16:41:27.519364
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c1d8e4a2f7b3'
+down_revision: Union[str, None] = 'b7f41c2d9a06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('transaction_rejections',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('merchant_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('reason', sa.String(length=100), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_transaction_rejections_created_at', 'transaction_rejections', ['created_at', 'id'], unique=False)
+    op.create_table('rejection_counters',
+    sa.Column('scope', sa.String(length=10), nullable=False),
+    sa.Column('subject_id', sa.Integer(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('rejections', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('scope', 'subject_id', 'bucket_start')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rejection_counters')
+    op.drop_index('ix_transaction_rejections_created_at', table_name='transaction_rejections')
+    op.drop_table('transaction_rejections')
@@ -0,0 +1,26 @@
+"""keyset_pagination_indexes
+
+Revision ID: d5e93b0a47c1
+Revises: a81f5d3c6e27
+Create Date: 2026-10-18 11:26:05.932170
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd5e93b0a47c1'
+down_revision: Union[str, None] = 'a81f5d3c6e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_created_at', 'users', ['created_at', 'id'], unique=False)
+    op.create_index('ix_merchants_created_at', 'merchants', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_merchants_created_at', table_name='merchants')
+    op.drop_index('ix_users_created_at', table_name='users')
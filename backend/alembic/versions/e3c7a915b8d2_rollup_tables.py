@@ -0,0 +1,52 @@
+"""rollup_tables
+
+Revision ID: e3c7a915b8d2
+Revises: 6b0d28f4c9e5
+Create Date: 2026-10-18 15:20:33.871052
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'e3c7a915b8d2'
+down_revision: Union[str, None] = '6b0d28f4c9e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rollups start empty; the rollup job folds existing history from watermark 0
+    op.create_table('merchant_rollups',
+    sa.Column('merchant_id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(length=5), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('fee_total', sa.Float(), nullable=False),
+    sa.Column('payout_total', sa.Float(), nullable=False),
+    sa.Column('volume', sa.Float(), nullable=False),
+    sa.Column('txn_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('merchant_id', 'granularity', 'bucket_start')
+    )
+    op.create_table('user_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(length=5), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('spend', sa.Float(), nullable=False),
+    sa.Column('txn_count', sa.Integer(), nullable=False),
+    sa.Column('paybacks', sa.Float(), nullable=False),
+    sa.Column('payback_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'granularity', 'bucket_start')
+    )
+    op.create_table('rollup_watermarks',
+    sa.Column('source', sa.String(length=50), nullable=False),
+    sa.Column('last_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('source')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rollup_watermarks')
+    op.drop_table('user_rollups')
+    op.drop_table('merchant_rollups')
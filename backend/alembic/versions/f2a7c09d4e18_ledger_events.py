@@ -0,0 +1,34 @@
+"""ledger_events
+
+Revision ID: f2a7c09d4e18
+Revises: 8f3b6a1e0c52
+Create Date: 2026-10-18 17:49:11.630582
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'f2a7c09d4e18'
+down_revision: Union[str, None] = '8f3b6a1e0c52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The feed starts empty; consumers read existing history from the tables
+    op.create_table('ledger_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=30), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('merchant_id', sa.Integer(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=True),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ledger_events')
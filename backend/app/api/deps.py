@@ -3,19 +3,34 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from jose import JWTError
 
-from app.core.database import get_db
+from app.core import auth_cache
+from app.core.database import DBRunner, get_db_runner
 from app.core.security import decode_token
 from app.models.user import User
+from app.schemas.user import UserResponse
 
 security = HTTPBearer()
 
 
-def get_current_user(
+def _load_user(db: Session, user_id: int):
+    user = db.query(User).filter(User.id == user_id).first()
+    snapshot = UserResponse.model_validate(user) if user else None
+    # Hand the connection back; long polls and event streams outlive this read
+    db.rollback()
+    return snapshot
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
+    db: DBRunner = Depends(get_db_runner),
+) -> UserResponse:
+    token = credentials.credentials
+    cached = auth_cache.get(token)
+    if cached is not None:
+        return cached
+
     try:
-        payload = decode_token(credentials.credentials)
+        payload = decode_token(token)
         user_id: int = int(payload.get("sub"))
     except (JWTError, ValueError, TypeError):
         raise HTTPException(
@@ -23,9 +38,11 @@ def get_current_user(
             detail="Could not validate credentials",
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    generation = auth_cache.generation(user_id)
+    snapshot = await db.run(_load_user, user_id)
+    if snapshot is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
         )
-    return user
+    auth_cache.put(token, payload, snapshot, generation)
+    return snapshot
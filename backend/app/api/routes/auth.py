@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import DBRunner, get_db_runner
 from app.schemas.user import UserCreate, UserResponse
 from app.schemas.auth import LoginRequest, Token
 from app.services import auth_service
@@ -10,13 +9,15 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=201)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: DBRunner = Depends(get_db_runner)):
     """Register a new user account."""
-    return auth_service.register_user(db, user_data)
+    return await auth_service.register_user(db, user_data)
 
 
 @router.post("/login", response_model=Token)
-def login(credentials: LoginRequest, db: Session = Depends(get_db)):
+async def login(credentials: LoginRequest, db: DBRunner = Depends(get_db_runner)):
     """Login with email and password, returns JWT token."""
-    user = auth_service.authenticate_user(db, credentials.email, credentials.password)
+    user = await auth_service.authenticate_user(
+        db, credentials.email, credentials.password
+    )
     return auth_service.create_user_token(user)
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import Optional
+
+from app.core.config import settings
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.api.deps import get_current_user
+from app.schemas.user import UserResponse
+from app.schemas.event import EventPage
+from app.services import event_service
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+@router.get("/", response_model=EventPage)
+async def list_events(
+    after: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    wait: float = Query(0, ge=0, le=settings.EVENTS_MAX_WAIT_SECONDS),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """Ledger events after the cursor, oldest first; waits up to `wait` seconds."""
+    return ORJSONResponse(await event_service.poll_events(after, limit, wait))
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    after: Optional[int] = Query(None, ge=0),
+    last_event_id: Optional[str] = Header(None),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """Server-sent ledger events after the cursor or the Last-Event-ID header."""
+    if after is None:
+        try:
+            after = max(int(last_event_id or 0), 0)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    return StreamingResponse(
+        event_service.stream_events(after, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,48 +1,54 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from typing import Optional
 
-from app.core.database import get_db
+from app.core.database import DBRunner, get_db_runner, get_read_db_runner
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from app.api.deps import get_current_user
-from app.models.user import User
+from app.schemas.user import UserResponse
 from app.schemas.merchant import (
     MerchantCreate,
     MerchantUpdate,
     MerchantResponse,
     MerchantOut,
 )
+from app.schemas.pagination import Page
 from app.services import merchant_service
 
 router = APIRouter(prefix="/merchants", tags=["Merchants"])
 
 
 @router.post("/", response_model=MerchantOut, status_code=201)
-def create_merchant(
+async def create_merchant(
     data: MerchantCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: DBRunner = Depends(get_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
 ):
     """Onboard a new merchant with a fee percentage."""
-    merchant = merchant_service.create_merchant(db, data)
+    merchant = await db.run(merchant_service.create_merchant, data)
     return MerchantOut(name=merchant.name, fee_percentage=merchant.fee_percentage)
 
 
 @router.patch("/{merchant_name}", response_model=MerchantOut)
-def update_merchant_fee(
+async def update_merchant_fee(
     merchant_name: str,
     data: MerchantUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: DBRunner = Depends(get_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
 ):
     """Update a merchant's fee percentage."""
-    merchant = merchant_service.update_merchant_fee(db, merchant_name, data)
+    merchant = await db.run(merchant_service.update_merchant_fee, merchant_name, data)
     return MerchantOut(name=merchant.name, fee_percentage=merchant.fee_percentage)
 
 
-@router.get("/", response_model=List[MerchantResponse])
-def list_merchants(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+@router.get("/", response_model=Page[MerchantResponse])
+async def list_merchants(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: DBRunner = Depends(get_read_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    """List all merchants."""
-    return merchant_service.get_all_merchants(db)
+    """List merchants, oldest first."""
+    return ORJSONResponse(
+        await db.run(merchant_service.get_all_merchants, cursor, limit)
+    )
@@ -1,20 +1,57 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, Form, Request, UploadFile
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
 
-from app.core.database import get_db
+from app.core import idempotency
+from app.core.database import DBRunner, get_db_runner, run_primary
 from app.api.deps import get_current_user
-from app.models.user import User
-from app.schemas.payback import PaybackCreate, PaybackOut
-from app.services import payback_service
+from app.schemas.user import UserResponse
+from app.schemas.payback import PaybackCreate, PaybackOut, PaybackImportReport
+from app.services import payback_service, payback_import_service
 
 router = APIRouter(prefix="/paybacks", tags=["Paybacks"])
 
 
 @router.post("/", response_model=PaybackOut, status_code=201)
-def create_payback(
+async def create_payback(
+    request: Request,
     data: PaybackCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: DBRunner = Depends(get_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
 ):
     """Pay back dues (full or partial)."""
-    return payback_service.create_payback(db, data)
+    return await idempotency.idempotent(
+        request,
+        db,
+        current_user.id,
+        "paybacks",
+        data,
+        PaybackOut,
+        201,
+        payback_service.create_payback,
+        data,
+    )
+
+
+@router.post("/import", response_model=PaybackImportReport)
+async def import_paybacks(
+    file: UploadFile = File(...),
+    format: Optional[str] = Form(None, pattern="^(csv|ndjson)$"),
+    import_name: Optional[str] = Form(None),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """Import a settlement file (CSV or NDJSON with user_name, amount).
+
+    Lines are committed in chunks; re-posting an unfinished import with the
+    same import_name (by default the file's hash) resumes after the last
+    committed line.
+    """
+    fmt = format or ("csv" if (file.filename or "").endswith(".csv") else "ndjson")
+    # Parsing and every chunk's I/O stay off the event loop, even in async mode
+    return await run_in_threadpool(
+        run_primary,
+        payback_import_service.run_payback_import,
+        file.file,
+        fmt,
+        import_name,
+    )
@@ -1,49 +1,161 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Query, Request
+from datetime import datetime
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core import report_cache
+from app.core.database import DBRunner, get_read_db_runner
 from app.api.deps import get_current_user
-from app.models.user import User
-from app.schemas.report import FeeReport, DuesReport, TotalDuesReport
-from app.services import report_service
+from app.schemas.user import UserResponse
+from app.schemas.report import (
+    FeeReport,
+    DuesReport,
+    TransactionCount,
+    TotalDuesReport,
+    FeeBucket,
+    UserActivityBucket,
+    RejectionCount,
+)
+from app.services import directory_service, rejection_service, report_service
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
 
 @router.get("/fee/{merchant_name}", response_model=FeeReport)
-def merchant_fee_report(
+async def merchant_fee_report(
+    request: Request,
     merchant_name: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    db: DBRunner = Depends(get_read_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    """Total fee collected from a specific merchant."""
-    return report_service.get_merchant_fee_report(db, merchant_name)
+    """Fee collected from a merchant, optionally within [from, to) to the hour."""
+    merchant = await db.run(directory_service.resolve_merchant, merchant_name)
+    return await report_cache.cached_report(
+        request,
+        db,
+        FeeReport,
+        f"fee:{merchant.id}:{start}:{end}",
+        (report_cache.merchant_tag(merchant.id),),
+        report_service.get_merchant_fee_report,
+        merchant_name,
+        start,
+        end,
+    )
+
+
+@router.get("/fee/{merchant_name}/breakdown", response_model=List[FeeBucket])
+async def merchant_fee_breakdown(
+    merchant_name: str,
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    db: DBRunner = Depends(get_read_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """Per-hour or per-day fees, payouts and volume for a merchant."""
+    return await db.run(
+        report_service.get_merchant_fee_breakdown,
+        merchant_name,
+        granularity,
+        start,
+        end,
+    )
 
 
 @router.get("/dues/{user_name}", response_model=DuesReport)
-def user_dues_report(
+async def user_dues_report(
     user_name: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: DBRunner = Depends(get_read_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
 ):
     """Total outstanding dues for a specific user."""
-    return report_service.get_user_dues_report(db, user_name)
+    return await db.run(report_service.get_user_dues_report, user_name)
+
+
+@router.get("/transactions/{user_name}", response_model=TransactionCount)
+async def user_transaction_count(
+    user_name: str,
+    db: DBRunner = Depends(get_read_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """Number of successful purchases for a specific user."""
+    return await db.run(report_service.get_user_transaction_count_report, user_name)
+
+
+@router.get("/activity/{user_name}", response_model=List[UserActivityBucket])
+async def user_activity_report(
+    user_name: str,
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    db: DBRunner = Depends(get_read_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """Per-hour or per-day spend and paybacks for a user."""
+    return await db.run(
+        report_service.get_user_activity_report, user_name, granularity, start, end
+    )
 
 
 @router.get("/users-at-credit-limit", response_model=List[str])
-def users_at_credit_limit(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def users_at_credit_limit(
+    request: Request,
+    db: DBRunner = Depends(get_read_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
 ):
     """List of users who have reached their credit limit."""
-    return report_service.get_users_at_limit_report(db)
+    return await report_cache.cached_report(
+        request,
+        db,
+        List[str],
+        "users-at-credit-limit",
+        (report_cache.DUES,),
+        report_service.get_users_at_limit_report,
+    )
 
 
 @router.get("/total-dues", response_model=TotalDuesReport)
-def total_dues_report(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def total_dues_report(
+    request: Request,
+    db: DBRunner = Depends(get_read_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
 ):
     """Total dues across all users with breakdown."""
-    return report_service.get_total_dues_report(db)
+    return await report_cache.cached_report(
+        request,
+        db,
+        TotalDuesReport,
+        "total-dues",
+        (report_cache.DUES,),
+        report_service.get_total_dues_report,
+    )
+
+
+@router.get("/rejections", response_model=List[RejectionCount])
+async def rejection_report(
+    scope: str = Query("user", pattern="^(user|merchant)$"),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    limit: int = Query(20, ge=1, le=500),
+    db: DBRunner = Depends(get_read_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """Users or merchants with the most declined purchases, by whole days."""
+    return await db.run(
+        rejection_service.get_rejection_counts, scope, start, end, limit
+    )
+
+
+@router.get("/rejections/{user_name}", response_model=RejectionCount)
+async def user_rejection_report(
+    user_name: str,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    db: DBRunner = Depends(get_read_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """Declined purchases for a specific user, by whole days."""
+    return await db.run(
+        rejection_service.get_user_rejection_count, user_name, start, end
+    )
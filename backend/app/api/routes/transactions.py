@@ -1,43 +1,135 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from datetime import datetime
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core import idempotency
+from app.core.database import DBRunner, get_db_runner, get_read_db_runner
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from app.api.deps import get_current_user
-from app.models.user import User
+from app.schemas.user import UserResponse
 from app.schemas.transaction import (
+    TransactionBatchCreate,
+    RejectionResponse,
     TransactionCreate,
     TransactionResponse,
     TransactionStatusResponse,
 )
-from app.services import transaction_service
+from app.schemas.pagination import Page
+from app.services import (
+    merchant_service,
+    rejection_service,
+    transaction_service,
+    user_service,
+)
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
 
 @router.post("/", response_model=TransactionStatusResponse, status_code=201)
-def create_transaction(
+async def create_transaction(
+    request: Request,
     data: TransactionCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: DBRunner = Depends(get_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
 ):
     """Create a new transaction. Rejected if user exceeds credit limit."""
-    return transaction_service.create_transaction(db, data)
+    return await idempotency.idempotent(
+        request,
+        db,
+        current_user.id,
+        "transactions",
+        data,
+        TransactionStatusResponse,
+        201,
+        transaction_service.create_transaction,
+        data,
+    )
+
+
+@router.post(
+    "/batch", response_model=List[TransactionStatusResponse], status_code=201
+)
+async def create_transactions_batch(
+    data: TransactionBatchCreate,
+    db: DBRunner = Depends(get_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """Create many transactions in one commit; results follow request order."""
+    return await db.run(transaction_service.create_transactions_batch, data.items)
+
+
+@router.get("/my", response_model=Page[TransactionResponse])
+async def my_transactions(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: DBRunner = Depends(get_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """Get the currently authenticated user's transactions, newest first."""
+    return ORJSONResponse(
+        await db.run(
+            transaction_service.get_user_transactions, current_user.id, cursor, limit
+        )
+    )
+
+
+@router.get("/", response_model=Page[TransactionResponse])
+async def all_transactions(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: DBRunner = Depends(get_read_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """Get transactions across all users, newest first."""
+    return ORJSONResponse(
+        await db.run(transaction_service.get_all_transactions, cursor, limit)
+    )
 
 
-@router.get("/my", response_model=List[TransactionResponse])
-def my_transactions(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+@router.get("/rejections", response_model=Page[RejectionResponse])
+async def rejected_attempts(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: DBRunner = Depends(get_read_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    """Get all transactions of the currently authenticated user."""
-    return transaction_service.get_user_transactions(db, current_user.id)
+    """Get declined purchase attempts across all users, newest first."""
+    return ORJSONResponse(await db.run(rejection_service.get_rejections, cursor, limit))
 
 
-@router.get("/", response_model=List[TransactionResponse])
-def all_transactions(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+@router.get("/export")
+async def export_transactions(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_name: Optional[str] = None,
+    merchant_name: Optional[str] = None,
+    status: Optional[str] = None,
+    db: DBRunner = Depends(get_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    """Get all transactions across all users."""
-    return transaction_service.get_all_transactions(db)
+    """Stream matching transactions as NDJSON or CSV."""
+    if status == "rejected":
+        # Declines live in the rejection log, not the ledger
+        raise HTTPException(
+            status_code=400,
+            detail="Declined purchases are served by /transactions/rejections",
+        )
+    user_id = merchant_id = None
+    if user_name:
+        user_id = (await db.run(user_service.get_user_by_name, user_name)).id
+    if merchant_name:
+        merchant_id = (
+            await db.run(merchant_service.get_merchant_by_name, merchant_name)
+        ).id
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        transaction_service.export_transactions(
+            format, start, end, user_id, merchant_id, status
+        ),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{format}"'
+        },
+    )
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from typing import Optional
 
-from app.core.database import get_db
+from app.core.database import DBRunner, get_read_db_runner
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from app.api.deps import get_current_user
-from app.models.user import User
+from app.schemas.pagination import Page
 from app.schemas.user import UserResponse
 from app.services import user_service
 
@@ -12,15 +13,17 @@ router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: UserResponse = Depends(get_current_user)):
     """Get the currently authenticated user."""
     return current_user
 
 
-@router.get("/", response_model=List[UserResponse])
-def list_users(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+@router.get("/", response_model=Page[UserResponse])
+async def list_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: DBRunner = Depends(get_read_db_runner),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    """List all users."""
-    return user_service.get_all_users(db)
+    """List users, oldest first."""
+    return ORJSONResponse(await db.run(user_service.get_all_users, cursor, limit))
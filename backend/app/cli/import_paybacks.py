@@ -0,0 +1,58 @@
+"""Import a bank settlement file of paybacks.
+
+Usage (from backend/):
+    python -m app.cli.import_paybacks settlements-2026-10-18.csv
+    python -m app.cli.import_paybacks day.ndjson --report day-report.ndjson
+
+Re-running an unfinished import with the same --name (by default the file's
+hash) resumes after the last committed line; a finished one is refused.
+"""
+import argparse
+import io
+import json
+import sys
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.payback_import_service import content_name, import_paybacks
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-import paybacks.")
+    parser.add_argument("path", help="CSV or NDJSON file with user_name, amount")
+    parser.add_argument("--format", choices=["csv", "ndjson"])
+    parser.add_argument("--name", help="checkpoint name (defaults to the file's hash)")
+    parser.add_argument(
+        "--chunk-size", type=int, default=settings.PAYBACK_IMPORT_CHUNK_SIZE
+    )
+    parser.add_argument("--report", help="write per-line NDJSON results here")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    report = open(args.report, "w") if args.report else sys.stdout
+    applied = rejected = 0
+    try:
+        with SessionLocal() as db, open(args.path, "rb") as source:
+            name = args.name or content_name(source)
+            lines = io.TextIOWrapper(source, encoding="utf-8", newline="")
+            for result in import_paybacks(db, lines, fmt, name, args.chunk_size):
+                if result["status"] == "applied":
+                    applied += 1
+                else:
+                    rejected += 1
+                report.write(json.dumps(result) + "\n")
+    except HTTPException as exc:
+        print(exc.detail, file=sys.stderr)
+        return 1
+    finally:
+        if report is not sys.stdout:
+            report.close()
+
+    print(f"applied={applied} rejected={rejected}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Maintain the monthly partitions of transactions and paybacks (MySQL).
+
+Usage (from backend/):
+    python -m app.cli.partitions list
+    python -m app.cli.partitions ensure --months-ahead 6
+    python -m app.cli.partitions archive --older-than-months 18
+    python -m app.cli.partitions archive --older-than-months 18 --to-dir /backups/ledger
+"""
+import argparse
+import json
+import sys
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.services import partition_service
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Ledger partition maintenance.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="show partitions and approximate row counts")
+    ensure = commands.add_parser("ensure", help="create upcoming monthly partitions")
+    ensure.add_argument(
+        "--months-ahead", type=int, default=settings.PARTITION_MONTHS_AHEAD
+    )
+    archive = commands.add_parser("archive", help="move aged months out and drop them")
+    archive.add_argument("--older-than-months", type=int, required=True)
+    archive.add_argument("--to-dir", help="write gzip NDJSON instead of archive tables")
+    args = parser.parse_args(argv)
+
+    if engine.dialect.name != "mysql":
+        print("partition maintenance requires MySQL", file=sys.stderr)
+        return 1
+
+    with SessionLocal() as db:
+        if args.command == "list":
+            result = {
+                table: partition_service.list_partitions(db, table)
+                for table in partition_service.PARTITIONED_TABLES
+            }
+        elif args.command == "ensure":
+            result = partition_service.ensure_future_partitions(db, args.months_ahead)
+        else:
+            result = partition_service.archive_partitions(
+                db, args.older_than_months, args.to_dir
+            )
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
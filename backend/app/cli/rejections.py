@@ -0,0 +1,37 @@
+"""Move declined purchases stored in transactions into the rejection log.
+
+Usage (from backend/):
+    python -m app.cli.rejections move
+    python -m app.cli.rejections move --batch-size 20000
+
+Declines recorded before the rejection log existed stay in ``transactions``
+until moved. Moving is batched and can be stopped and re-run.
+"""
+import argparse
+import json
+import sys
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services import rejection_service
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rejection log maintenance.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    move = commands.add_parser(
+        "move", help="move rejected transactions rows into the rejection log"
+    )
+    move.add_argument(
+        "--batch-size", type=int, default=settings.REJECTION_FLUSH_BATCH
+    )
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        moved = rejection_service.move_ledger_rejections(db, args.batch_size)
+    print(json.dumps({"moved": moved}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
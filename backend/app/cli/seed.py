@@ -0,0 +1,337 @@
+"""Generate a synthetic ledger for local performance work.
+
+Usage (from backend/):
+    python -m app.cli.seed --users 100000 --transactions 10000000 --paybacks 2000000
+    python -m app.cli.seed --truncate --seed 7 --method load-data --rollups
+
+Users share one precomputed password hash (--password). Purchases and
+paybacks are generated in time order against running per-user dues, so no
+user ever exceeds their credit_limit and user_balances matches the ledger.
+Purchases that would exceed it go to the rejection log and its counters.
+The same --seed always produces the same rows.
+"""
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import engine as default_engine
+from app.core.security import get_password_hash
+from app.models import (
+    IdempotencyKey,
+    ImportCheckpoint,
+    LedgerEvent,
+    Merchant,
+    MerchantRollup,
+    Payback,
+    RejectionCounter,
+    RollupGap,
+    RollupWatermark,
+    Transaction,
+    TransactionRejection,
+    User,
+    UserBalance,
+    UserRollup,
+)
+
+PASSWORD = "seed-password"
+CHUNK = 10000
+CREDIT_LIMITS = (250.0, 500.0, 1000.0, 2500.0, 5000.0, 10000.0)
+CREDIT_LIMIT_WEIGHTS = (10, 25, 30, 20, 10, 5)
+# Most merchants sit near the common 1.5-3% MDR band, a few charge far more
+FEE_BANDS = ((0.5, 1.5), (1.5, 3.0), (3.0, 6.0))
+FEE_BAND_WEIGHTS = (20, 65, 15)
+
+# Children first so truncation never trips a foreign key
+SEEDED_TABLES = (
+    IdempotencyKey,
+    ImportCheckpoint,
+    LedgerEvent,
+    RejectionCounter,
+    TransactionRejection,
+    UserRollup,
+    MerchantRollup,
+    RollupWatermark,
+    RollupGap,
+    UserBalance,
+    Payback,
+    Transaction,
+    Merchant,
+    User,
+)
+
+
+def _write_insert(conn, model, columns, rows) -> None:
+    conn.execute(insert(model), [dict(zip(columns, row)) for row in rows])
+
+
+def _write_load_data(conn, model, columns, rows) -> None:
+    # MySQL reads the chunk from a client-side file; \N is its NULL marker
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            for row in rows:
+                writer.writerow(["\\N" if v is None else v for v in row])
+        conn.exec_driver_sql(
+            f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE {model.__tablename__} "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+            f"LINES TERMINATED BY '\\n' ({', '.join(columns)})"
+        )
+    finally:
+        os.remove(path)
+
+
+class _ChunkWriter:
+    """Buffers rows per table and writes them ``chunk_size`` at a time."""
+
+    def __init__(self, conn, write, chunk_size: int):
+        self.conn = conn
+        self.write = write
+        self.chunk_size = chunk_size
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, model, columns, row) -> None:
+        buffer = self.buffers.setdefault(model, (columns, []))[1]
+        buffer.append(row)
+        if len(buffer) >= self.chunk_size:
+            self.flush(model)
+
+    def flush(self, model=None) -> None:
+        for m in [model] if model is not None else list(self.buffers):
+            columns, rows = self.buffers[m]
+            if rows:
+                self.write(self.conn, m, columns, rows)
+                self.counts[m.__tablename__] = (
+                    self.counts.get(m.__tablename__, 0) + len(rows)
+                )
+                rows.clear()
+
+
+USER_COLUMNS = (
+    "id",
+    "name",
+    "email",
+    "hashed_password",
+    "credit_limit",
+    "created_at",
+    "updated_at",
+)
+MERCHANT_COLUMNS = ("id", "name", "fee_percentage", "created_at", "updated_at")
+TRANSACTION_COLUMNS = (
+    "user_id",
+    "merchant_id",
+    "amount",
+    "fee_amount",
+    "merchant_payout",
+    "status",
+    "rejection_reason",
+    "created_at",
+)
+REJECTION_COLUMNS = ("user_id", "merchant_id", "amount", "reason", "created_at")
+COUNTER_COLUMNS = ("scope", "subject_id", "bucket_start", "rejections", "amount")
+PAYBACK_COLUMNS = ("user_id", "amount", "created_at")
+BALANCE_COLUMNS = ("user_id", "dues", "available_credit", "updated_at")
+
+
+def seed(
+    conn,
+    users: int,
+    merchants: int,
+    transactions: int,
+    paybacks: int,
+    seed: int = 42,
+    days: int = 365,
+    password: str = PASSWORD,
+    method: str = "insert",
+    chunk_size: int = CHUNK,
+) -> dict:
+    """Write a deterministic, credit-consistent ledger into empty tables.
+
+    ``conn`` is a Connection (or Session) with an open transaction; the
+    caller commits. Returns the number of rows written per table.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    start = now - timedelta(days=days)
+    write = _write_load_data if method == "load-data" else _write_insert
+    out = _ChunkWriter(conn, write, chunk_size)
+    hashed = get_password_hash(password)
+
+    limits = [0.0] * (users + 1)
+    for i in range(1, users + 1):
+        limits[i] = rng.choices(CREDIT_LIMITS, CREDIT_LIMIT_WEIGHTS)[0]
+        joined = start + timedelta(seconds=rng.randrange(86400))
+        out.add(
+            User,
+            USER_COLUMNS,
+            (i, f"user{i}", f"user{i}@seed.local", hashed, limits[i], joined, joined),
+        )
+    fees = [0.0] * (merchants + 1)
+    for i in range(1, merchants + 1):
+        low, high = rng.choices(FEE_BANDS, FEE_BAND_WEIGHTS)[0]
+        fees[i] = round(rng.uniform(low, high), 2)
+        out.add(Merchant, MERCHANT_COLUMNS, (i, f"merchant{i}", fees[i], start, start))
+    out.flush()
+
+    # Heavy-tailed popularity: a few users and merchants carry most traffic
+    user_weights = _cumulative_pareto(rng, users)
+    merchant_weights = _cumulative_pareto(rng, merchants)
+    user_ids = range(1, users + 1)
+    merchant_ids = range(1, merchants + 1)
+
+    dues = [0.0] * (users + 1)
+    rejections = {}
+    events = transactions + paybacks
+    step = (now - start).total_seconds() / max(events, 1)
+    payback_share = paybacks / max(events, 1)
+    remaining_txns, remaining_paybacks = transactions, paybacks
+    for n in range(events):
+        created_at = start + timedelta(seconds=int(n * step))
+        is_payback = remaining_txns == 0 or (
+            remaining_paybacks and rng.random() < payback_share
+        )
+        if is_payback:
+            remaining_paybacks -= 1
+            # Redraw a few times so paybacks land on users who owe something
+            for _ in range(8):
+                user_id = rng.choices(user_ids, cum_weights=user_weights)[0]
+                if dues[user_id] > 0:
+                    break
+            else:
+                continue
+            amount = round(rng.uniform(0.2, 1.0) * dues[user_id], 2)
+            if amount <= 0:
+                continue
+            dues[user_id] = round(dues[user_id] - amount, 2)
+            out.add(Payback, PAYBACK_COLUMNS, (user_id, amount, created_at))
+            continue
+
+        remaining_txns -= 1
+        user_id = rng.choices(user_ids, cum_weights=user_weights)[0]
+        merchant_id = rng.choices(merchant_ids, cum_weights=merchant_weights)[0]
+        amount = round(min(max(rng.lognormvariate(3.5, 1.0), 1.0), 5000.0), 2)
+        if dues[user_id] + amount > limits[user_id]:
+            out.add(
+                TransactionRejection,
+                REJECTION_COLUMNS,
+                (user_id, merchant_id, amount, "credit limit", created_at),
+            )
+            day = created_at.replace(hour=0, minute=0, second=0)
+            for key in (("user", user_id, day), ("merchant", merchant_id, day)):
+                counter = rejections.setdefault(key, [0, 0.0])
+                counter[0] += 1
+                counter[1] += amount
+            continue
+        fee = round(amount * fees[merchant_id] / 100, 2)
+        payout = round(amount - fee, 2)
+        dues[user_id] = round(dues[user_id] + amount, 2)
+        out.add(
+            Transaction,
+            TRANSACTION_COLUMNS,
+            (user_id, merchant_id, amount, fee, payout, "success", None, created_at),
+        )
+    for (scope, subject_id, day), (count, total) in rejections.items():
+        out.add(
+            RejectionCounter,
+            COUNTER_COLUMNS,
+            (scope, subject_id, day, count, round(total, 2)),
+        )
+    out.flush()
+
+    for user_id in user_ids:
+        out.add(
+            UserBalance,
+            BALANCE_COLUMNS,
+            (user_id, dues[user_id], round(limits[user_id] - dues[user_id], 2), now),
+        )
+    out.flush()
+    return out.counts
+
+
+def _cumulative_pareto(rng: random.Random, n: int):
+    total, weights = 0.0, []
+    for _ in range(n):
+        total += rng.paretovariate(1.2)
+        weights.append(total)
+    return weights
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Seed a synthetic ledger.")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--merchants", type=int, default=500)
+    parser.add_argument("--transactions", type=int, default=1000000)
+    parser.add_argument("--paybacks", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default=PASSWORD)
+    parser.add_argument("--method", choices=["insert", "load-data"], default="insert")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK)
+    parser.add_argument(
+        "--truncate", action="store_true", help="delete existing ledger rows first"
+    )
+    parser.add_argument(
+        "--rollups", action="store_true", help="build rollup tables after seeding"
+    )
+    args = parser.parse_args(argv)
+
+    if args.database_url == settings.DATABASE_URL:
+        engine = default_engine
+    else:
+        engine = create_engine(args.database_url)
+    if args.method == "load-data":
+        if engine.dialect.name != "mysql":
+            parser.error("--method load-data requires MySQL")
+        engine = create_engine(engine.url, connect_args={"local_infile": True})
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        if args.truncate:
+            for model in SEEDED_TABLES:
+                conn.execute(delete(model))
+        elif conn.execute(select(func.count()).select_from(User)).scalar():
+            print("users table is not empty; pass --truncate", file=sys.stderr)
+            return 1
+        counts = seed(
+            conn,
+            args.users,
+            args.merchants,
+            args.transactions,
+            args.paybacks,
+            seed=args.seed,
+            days=args.days,
+            password=args.password,
+            method=args.method,
+            chunk_size=args.chunk_size,
+        )
+    elapsed = time.perf_counter() - started
+    rows = sum(counts.values())
+    print(
+        " ".join(f"{table}={n}" for table, n in counts.items())
+        + f" rows={rows} seconds={elapsed:.1f}"
+        + f" rows_per_minute={math.floor(rows / elapsed * 60) if elapsed else rows}",
+        file=sys.stderr,
+    )
+
+    if args.rollups:
+        from app.services.rollup_service import refresh_rollups
+
+        with Session(engine) as db:
+            print(refresh_rollups(db), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
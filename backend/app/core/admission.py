@@ -0,0 +1,258 @@
+"""Admission control: per-class concurrency limits and token-bucket rate limits.
+
+Requests are sorted into route classes (auth, writes, reports, lists) by
+path and method before routing. Each class admits a bounded number of
+requests at once and answers the rest with an immediate ``503``, so a spike
+in reports or bcrypt logins cannot queue up purchases behind it. Callers
+are also metered by per-user and per-IP token buckets (``429``). Both
+answers carry ``Retry-After``.
+
+Buckets live in a size-bounded in-process map, or with
+``ADMISSION_BACKEND=sqlite`` in a local file shared by every worker on the
+host; it is not shared between hosts, so behind a load balancer each host
+meters callers on its own. The file is updated from the threadpool, so a
+locked file never stalls the event loop. Concurrency is counted per worker.
+"""
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from jose import JWTError
+from starlette.concurrency import run_in_threadpool
+
+from app.core import auth_cache, metrics
+from app.core.config import settings
+from app.core.security import decode_token
+
+WRITE_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+# Never limited, so health checks and scrapes keep working under overload
+EXEMPT_PATHS = frozenset(
+    ("/", "/health", "/metrics", "/docs", "/redoc", "/openapi.json")
+)
+LIST_PREFIXES = ("/users/", "/merchants/", "/transactions/", "/paybacks/")
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """The concurrency class of a request, or None if it is not limited."""
+    if path.startswith("/auth/"):
+        return "auth"
+    if path.startswith("/reports/"):
+        return "reports"
+    if method in WRITE_METHODS:
+        return "writes"
+    if path.startswith(LIST_PREFIXES):
+        return "lists"
+    # The event feed: its long polls hold no connection while they wait
+    return None
+
+
+class MemoryBuckets:
+    """Token buckets in an LRU map; evicted keys come back with a full bucket."""
+
+    blocking = False
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token; returns 0 if granted, else seconds until one is free."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            granted = tokens >= 1
+            if granted:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0.0 if granted else (1 - tokens) / rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteBuckets:
+    """Token buckets in a SQLite file, one connection per thread."""
+
+    blocking = True
+    PRUNE_EVERY = 1000
+    # Refill, then take a token only if a whole one is there; SET expressions
+    # all see the row as it was before the update
+    TAKE = (
+        "INSERT INTO admission_buckets VALUES (:key, :burst - 1, :now, 1) "
+        "ON CONFLICT(key) DO UPDATE SET "
+        "granted = MIN(:burst, tokens + (:now - updated_at) * :rate) >= 1, "
+        "tokens = MIN(:burst, tokens + (:now - updated_at) * :rate) - "
+        "(MIN(:burst, tokens + (:now - updated_at) * :rate) >= 1), "
+        "updated_at = :now "
+        "RETURNING tokens, granted"
+    )
+
+    def __init__(self, path: str, max_keys: int):
+        self.path = path
+        self.max_keys = max_keys
+        self._writes = 0
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS admission_buckets (key TEXT PRIMARY KEY, "
+            "tokens REAL NOT NULL, updated_at REAL NOT NULL, granted INTEGER)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        conn = self._conn()
+        # Wall clock, since the file is shared between processes
+        params = {"key": key, "burst": burst, "rate": rate, "now": time.time()}
+        tokens, granted = conn.execute(self.TAKE, params).fetchone()
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            conn.execute(
+                "DELETE FROM admission_buckets WHERE key NOT IN (SELECT key FROM "
+                "admission_buckets ORDER BY updated_at DESC LIMIT ?)",
+                (self.max_keys,),
+            )
+        return 0.0 if granted else (1 - tokens) / rate
+
+    def __len__(self) -> int:
+        query = "SELECT COUNT(*) FROM admission_buckets"
+        (size,) = self._conn().execute(query).fetchone()
+        return size
+
+
+def _make_buckets():
+    if not settings.ADMISSION_ENABLED:
+        return None
+    if settings.ADMISSION_BACKEND == "sqlite":
+        return SQLiteBuckets(settings.ADMISSION_PATH, settings.ADMISSION_MAX_KEYS)
+    return MemoryBuckets(settings.ADMISSION_MAX_KEYS)
+
+
+CLASS_LIMITS = {
+    "auth": settings.ADMISSION_AUTH_CONCURRENCY,
+    "writes": settings.ADMISSION_WRITE_CONCURRENCY,
+    "reports": settings.ADMISSION_REPORT_CONCURRENCY,
+    "lists": settings.ADMISSION_LIST_CONCURRENCY,
+}
+# Only touched from the event loop, so no lock is needed
+_in_flight = {name: 0 for name in CLASS_LIMITS}
+_buckets = _make_buckets()
+
+
+def _user_id(headers: dict) -> Optional[int]:
+    header = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = header.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    user = auth_cache.get(token)
+    if user is not None:
+        return user.id
+    try:
+        return int(decode_token(token).get("sub"))
+    except (JWTError, ValueError, TypeError):
+        return None
+
+
+def _client_ip(scope, headers: dict) -> str:
+    if settings.ADMISSION_TRUST_FORWARDED:
+        forwarded = headers.get(b"x-forwarded-for")
+        if forwarded:
+            return forwarded.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+async def _take(key: str, rate: float, burst: int) -> float:
+    if _buckets.blocking:
+        return await run_in_threadpool(_buckets.take, key, rate, burst)
+    return _buckets.take(key, rate, burst)
+
+
+async def _rate_limited(scope) -> float:
+    """Seconds until the caller may retry, or 0 if admitted."""
+    if not (settings.ADMISSION_IP_RATE or settings.ADMISSION_USER_RATE):
+        return 0.0
+    headers = dict(scope["headers"])
+    if settings.ADMISSION_IP_RATE:
+        wait = await _take(
+            f"ip:{_client_ip(scope, headers)}",
+            settings.ADMISSION_IP_RATE,
+            settings.ADMISSION_IP_BURST,
+        )
+        if wait:
+            return wait
+    if settings.ADMISSION_USER_RATE:
+        user_id = _user_id(headers)
+        if user_id is not None:
+            return await _take(
+                f"user:{user_id}",
+                settings.ADMISSION_USER_RATE,
+                settings.ADMISSION_USER_BURST,
+            )
+    return 0.0
+
+
+async def _reject(send, status: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode("ascii")),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """Sheds load per route class and rate-limits callers before routing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            return await self.app(scope, receive, send)
+
+        name = route_class(scope["method"], scope["path"])
+        wait = await _rate_limited(scope)
+        if wait:
+            metrics.ADMISSION_REJECTED.inc(name or "other", "rate_limited")
+            return await _reject(send, 429, "Too many requests", wait)
+        if name is None:
+            return await self.app(scope, receive, send)
+        if _in_flight[name] >= CLASS_LIMITS[name]:
+            metrics.ADMISSION_REJECTED.inc(name, "saturated")
+            return await _reject(send, 503, f"Too many {name} requests in progress", 1)
+
+        _in_flight[name] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _in_flight[name] -= 1
+
+
+def stats() -> dict:
+    return {
+        "in_flight": dict(_in_flight),
+        "buckets": len(_buckets) if _buckets is not None else 0,
+    }
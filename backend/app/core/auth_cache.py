@@ -0,0 +1,48 @@
+import threading
+import time
+from typing import Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.schemas.user import UserResponse
+
+# token -> (claims, user snapshot, user generation)
+_tokens = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+# Bumped whenever a user changes so their cached snapshots stop matching
+_generations: dict = {}
+_lock = threading.Lock()
+
+
+def get(token: str) -> Optional[UserResponse]:
+    entry = _tokens.get(token)
+    if entry is None:
+        return None
+    claims, user, generation = entry
+    if _generations.get(user.id, 0) != generation:
+        _tokens.pop(token)
+        return None
+    return user
+
+
+def generation(user_id: int) -> int:
+    return _generations.get(user_id, 0)
+
+
+def put(token: str, claims: dict, user: UserResponse, user_generation: int) -> None:
+    """Cache a verified token; read ``user_generation`` before loading ``user``."""
+    ttl = settings.AUTH_CACHE_TTL_SECONDS
+    expires_at = claims.get("exp")
+    if expires_at is not None:
+        ttl = min(ttl, float(expires_at) - time.time())
+    if ttl <= 0:
+        return
+    _tokens.set(token, (claims, user, user_generation), ttl=ttl)
+
+
+def invalidate_user(user_id: int) -> None:
+    with _lock:
+        _generations[user_id] = _generations.get(user_id, 0) + 1
+
+
+def stats() -> dict:
+    return _tokens.stats()
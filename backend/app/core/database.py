@@ -1,25 +1,362 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import List, Sequence
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
+from app.core import metrics
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+class _TimedCheckout:
+    """Pool mixin that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.DB_POOL_WAIT.observe(time.perf_counter() - started, self.label)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    label = "sync"
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    label = "async"
+
+
+def _time_queries(sync_engine) -> None:
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        kind = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        metrics.DB_QUERIES.observe(
+            time.perf_counter() - context._query_started, kind
+        )
+
 
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=TimedQueuePool,
     pool_pre_ping=True,
     pool_recycle=300,
     echo=False,
 )
+_time_queries(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# For sessions that never write; on SQLite they skip the write lock
+ReadSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine.execution_options(read_only=True)
+)
+
+
+def _begin_sqlite_transactions(sync_engine) -> None:
+    """Take SQLite's write lock when a transaction starts, not at its first write.
+
+    pysqlite only emits BEGIN ahead of DML and SQLite ignores FOR UPDATE, so
+    a balance read-then-write could interleave with another writer and lose
+    its update. BEGIN IMMEDIATE serializes writers the way the MySQL row lock
+    does; waiters block for the driver's busy timeout. Connections with the
+    ``read_only`` execution option use a deferred BEGIN so readers don't
+    queue behind writers.
+    """
+
+    @event.listens_for(sync_engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(sync_engine, "begin")
+    def _emit_begin(conn):
+        if conn.get_execution_options().get("read_only"):
+            conn.exec_driver_sql("BEGIN")
+        else:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+if engine.dialect.name == "sqlite":
+    _begin_sqlite_transactions(engine)
+
+
+def _async_url(url: str) -> str:
+    # mysql+pymysql:// -> mysql+aiomysql://, sqlite:// -> sqlite+aiosqlite://
+    scheme, rest = url.split("://", 1)
+    backend = scheme.split("+", 1)[0]
+    driver = {"mysql": "aiomysql", "sqlite": "aiosqlite"}.get(backend)
+    return f"{backend}+{driver}://{rest}" if driver else url
+
+
+async_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+if settings.ASYNC_DB_ENABLED:
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL or _async_url(settings.DATABASE_URL),
+        poolclass=TimedAsyncQueuePool,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        echo=False,
+    )
+    _time_queries(async_engine.sync_engine)
+    if async_engine.dialect.name == "sqlite":
+        _begin_sqlite_transactions(async_engine.sync_engine)
+    # Objects are serialized after the session's greenlet returns, so keep them loaded
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+    AsyncReadSessionLocal = async_sessionmaker(
+        async_engine.execution_options(read_only=True),
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+def _overflow(pool) -> int:
+    # QueuePool counts up from -pool_size until the pool is full
+    return max(0, pool.overflow())
+
+
+POOL_GAUGES = (
+    ("db_pool_size", "Configured pool size.", QueuePool.size),
+    ("db_pool_checked_out", "Connections currently checked out.", QueuePool.checkedout),
+    ("db_pool_checked_in", "Idle connections held by the pool.", QueuePool.checkedin),
+    ("db_pool_overflow", "Connections opened beyond pool_size.", _overflow),
+)
+
+
+class ReplicaSet:
+    """Read replicas picked round-robin, skipping any marked down.
+
+    A replica is marked down when a read on it fails to connect or execute,
+    and comes back once the periodic ``check`` can query it again.
+    """
+
+    def __init__(self, urls: Sequence[str]):
+        self.engines = []
+        for url in urls:
+            replica = create_engine(
+                url,
+                poolclass=TimedQueuePool,
+                pool_pre_ping=True,
+                pool_recycle=300,
+                echo=False,
+            )
+            _time_queries(replica)
+            self.engines.append(replica)
+        self._sessions = {
+            replica: sessionmaker(autocommit=False, autoflush=False, bind=replica)
+            for replica in self.engines
+        }
+        self._down = set()
+        self._turn = itertools.count()
+
+    def candidates(self) -> list:
+        if not self.engines:
+            return []
+        start = next(self._turn)
+        ordered = [
+            self.engines[(start + i) % len(self.engines)]
+            for i in range(len(self.engines))
+        ]
+        return [replica for replica in ordered if replica not in self._down]
+
+    def session(self, replica):
+        return self._sessions[replica]()
+
+    def mark_down(self, replica) -> None:
+        if replica not in self._down:
+            self._down.add(replica)
+            logger.warning(
+                "Read replica %s marked down", replica.url.render_as_string()
+            )
+
+    def check(self) -> None:
+        for replica in self.engines:
+            try:
+                with replica.connect() as conn:
+                    conn.exec_driver_sql("SELECT 1")
+            except OperationalError:
+                self.mark_down(replica)
+            else:
+                self._down.discard(replica)
+
+
+replicas = ReplicaSet(
+    [url.strip() for url in settings.READ_DATABASE_URLS.split(",") if url.strip()]
+)
+
+
+def _pool_metrics():
+    pools = [("sync", engine.pool)]
+    if async_engine is not None:
+        pools.append(("async", async_engine.pool))
+    pools.extend((f"replica{i}", r.pool) for i, r in enumerate(replicas.engines))
+    for name, help, read in POOL_GAUGES:
+        yield name, "gauge", help, [({"engine": n}, read(p)) for n, p in pools]
+
+
+metrics.register_collector(_pool_metrics)
 
 
 class Base(DeclarativeBase):
     pass
 
 
+class DBRunner:
+    """Runs sync service functions against the request's session.
+
+    On the async engine the function runs inside ``AsyncSession.run_sync``, so
+    its queries await the driver on the event loop instead of holding a
+    threadpool slot. On the sync engine it is dispatched to the threadpool.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn, *args, **kwargs):
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+# MySQL lock wait timeout and deadlock; the losing transaction is rolled back
+LOCK_CONFLICT_ERRORS = (1205, 1213)
+
+
+def is_lock_conflict(exc: OperationalError) -> bool:
+    args = getattr(exc.orig, "args", ())
+    if args and args[0] in LOCK_CONFLICT_ERRORS:
+        return True
+    return "database is locked" in str(exc.orig)
+
+
+def run_with_lock_retry(db, fn, *args, retries: int = settings.DB_LOCK_RETRIES):
+    """Run ``fn(db, *args)``, re-running it if it loses a row-lock conflict."""
+    for attempt in range(retries + 1):
+        try:
+            return fn(db, *args)
+        except OperationalError as exc:
+            db.rollback()
+            if attempt == retries or not is_lock_conflict(exc):
+                raise
+
+
+def upsert_increment(db, model, rows: List[dict], key_columns: Sequence[str]) -> None:
+    """Insert ``rows``, adding their values onto any existing row with the same key."""
+    if not rows:
+        return
+    table = model.__table__
+    value_columns = [c for c in rows[0] if c not in key_columns]
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            {c: table.c[c] + stmt.inserted[c] for c in value_columns}
+        )
+    elif dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else postgresql_insert)(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={c: table.c[c] + stmt.excluded[c] for c in value_columns},
+        )
+    else:
+        raise NotImplementedError(f"upsert is not supported on {dialect}")
+    db.execute(stmt, rows)
+
+
+def run_read(fn, *args, **kwargs):
+    """Run read-only ``fn(db, ...)`` on a replica, failing over to the primary.
+
+    The function is re-run on the next replica when one errors, so it must
+    not write.
+    """
+    for replica in replicas.candidates():
+        db = replicas.session(replica)
+        try:
+            return fn(db, *args, **kwargs)
+        except OperationalError:
+            replicas.mark_down(replica)
+        finally:
+            db.close()
+    db = ReadSessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+def run_primary(fn, *args, **kwargs):
+    """Run ``fn(db, ...)`` in a fresh primary session outside any request."""
+    with SessionLocal() as db:
+        return fn(db, *args, **kwargs)
+
+
+class ReadDBRunner(DBRunner):
+    """DBRunner for read-only routes; every call goes through ``run_read``."""
+
+    def __init__(self):
+        super().__init__(None)
+
+    async def run(self, fn, *args, **kwargs):
+        return await run_in_threadpool(run_read, fn, *args, **kwargs)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+@asynccontextmanager
+async def _primary_runner(read_only: bool = False):
+    if AsyncSessionLocal is not None:
+        factory = AsyncReadSessionLocal if read_only else AsyncSessionLocal
+        async with factory() as session:
+            yield DBRunner(session)
+    else:
+        db = (ReadSessionLocal if read_only else SessionLocal)()
+        try:
+            yield DBRunner(db)
+        finally:
+            await run_in_threadpool(db.close)
+
+
+async def get_db_runner():
+    async with _primary_runner() as runner:
+        yield runner
+
+
+# Lets a client that just wrote read it back from the primary
+READ_PRIMARY_HEADER = "X-Read-Primary"
+
+
+async def get_read_db_runner(request: Request):
+    wants_primary = request.headers.get(READ_PRIMARY_HEADER, "").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    if replicas.engines and not wants_primary:
+        # Replica reads open their own sessions; no primary session is needed
+        yield ReadDBRunner()
+    else:
+        async with _primary_runner(read_only=True) as runner:
+            yield runner
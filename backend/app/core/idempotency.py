@@ -0,0 +1,289 @@
+"""``Idempotency-Key`` support for POST endpoints that write to the ledger.
+
+The first request with a key claims it by committing a pending row with a
+short lease, then runs. The service stores its response on that row with
+``record`` in the same commit as its ledger write, so a key can never end
+up with a committed write but no response. Retries with the same key get
+the stored response back without running again. Completed responses are
+also kept in a bounded in-process cache. A duplicate that arrives while the
+first is still running waits for it: on a future when both reached the
+same worker, otherwise by polling the row until ``IDEMPOTENCY_WAIT_SECONDS``.
+A claim whose lease ran out can be taken over by a retry; the original
+request then fails to store its response and its write is rolled back.
+"""
+import asyncio
+import hashlib
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import DBRunner, SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+
+KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.05
+
+Entry = namedtuple("Entry", ["fingerprint", "status_code", "body"])
+Claim = namedtuple("Claim", ["ident", "lease", "fingerprint", "status_code", "adapter"])
+# Session.info keys linking a running request's claim to its service call
+CLAIM_INFO = "idempotency_claim"
+ENTRY_INFO = "idempotency_entry"
+
+_cache = TTLCache(
+    settings.IDEMPOTENCY_CACHE_MAX_ENTRIES, settings.IDEMPOTENCY_TTL_SECONDS
+)
+# (user_id, scope, key) -> future resolved when the running request finishes
+_in_flight: dict = {}
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_model) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def _fingerprint(payload: BaseModel) -> str:
+    return hashlib.sha256(payload.model_dump_json().encode("utf-8")).hexdigest()
+
+
+def _row(db, ident):
+    user_id, scope, key = ident
+    return db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.scope == scope,
+        IdempotencyKey.key == key,
+    )
+
+
+def _lease_end(now: datetime) -> datetime:
+    # Whole seconds so the value survives a DATETIME column unchanged; the
+    # claim's expiry doubles as its token, and a takeover only happens after
+    # it has passed, so two claims never share one
+    lease = now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+    return lease.replace(microsecond=0) + timedelta(seconds=1)
+
+
+def _claim(db, ident, fingerprint: str):
+    """Insert the pending row and return its lease, or the entry holding the key."""
+    user_id, scope, key = ident
+    now = datetime.utcnow()
+    lease = _lease_end(now)
+    try:
+        db.execute(
+            insert(IdempotencyKey).values(
+                user_id=user_id,
+                scope=scope,
+                key=key,
+                fingerprint=fingerprint,
+                created_at=now,
+                expires_at=lease,
+            )
+        )
+        db.commit()
+        return lease, None
+    except IntegrityError:
+        db.rollback()
+
+    existing = (
+        _row(db, ident)
+        .with_entities(
+            IdempotencyKey.fingerprint,
+            IdempotencyKey.status_code,
+            IdempotencyKey.body,
+            IdempotencyKey.expires_at,
+        )
+        .first()
+    )
+    if existing is None:
+        return _claim(db, ident, fingerprint)
+    if existing.expires_at <= now:
+        # Expired, or a pending claim whose lease ran out; the key is free again
+        _row(db, ident).filter(IdempotencyKey.expires_at <= now).delete(
+            synchronize_session=False
+        )
+        db.commit()
+        return _claim(db, ident, fingerprint)
+    # End the snapshot so the next poll sees the other request's commit
+    db.rollback()
+    return None, Entry(existing.fingerprint, existing.status_code, existing.body)
+
+
+def _held(db, claim: Claim):
+    return _row(db, claim.ident).filter(
+        IdempotencyKey.status_code.is_(None),
+        IdempotencyKey.expires_at == claim.lease,
+    )
+
+
+def record(db: Session, response) -> None:
+    """Store ``response`` for the request's key in the caller's transaction.
+
+    A no-op for requests without an ``Idempotency-Key``; the caller commits.
+    """
+    claim = db.info.get(CLAIM_INFO)
+    if claim is None:
+        return
+    body = claim.adapter.dump_json(claim.adapter.validate_python(response))
+    entry = Entry(claim.fingerprint, claim.status_code, body.decode("utf-8"))
+    expires_at = datetime.utcnow() + timedelta(
+        seconds=settings.IDEMPOTENCY_TTL_SECONDS
+    )
+    stored = _held(db, claim).update(
+        {
+            "status_code": entry.status_code,
+            "body": entry.body,
+            "expires_at": expires_at,
+        },
+        synchronize_session=False,
+    )
+    if not stored:
+        # A retry took the key over after the lease ran out; it does the write
+        raise HTTPException(
+            status_code=409,
+            detail=f"The claim on this {KEY_HEADER} expired before the write",
+        )
+    db.info[ENTRY_INFO] = entry
+
+
+def _run(db, claim: Claim, fn, args):
+    db.info[CLAIM_INFO] = claim
+    try:
+        value = fn(db, *args)
+        entry = db.info.get(ENTRY_INFO)
+        if entry is None:
+            # fn has no record() call; store the response in a commit of its own
+            record(db, value)
+            db.commit()
+            entry = db.info[ENTRY_INFO]
+        return entry
+    finally:
+        db.info.pop(CLAIM_INFO, None)
+        db.info.pop(ENTRY_INFO, None)
+
+
+def _release(db, claim: Claim) -> None:
+    db.rollback()
+    _held(db, claim).delete(synchronize_session=False)
+    db.commit()
+
+
+def _check_fingerprint(entry: Entry, fingerprint: str) -> None:
+    if entry.fingerprint != fingerprint:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{KEY_HEADER} was already used with a different request",
+        )
+
+
+def _replay(entry: Entry, fingerprint: str, scope: str) -> Response:
+    _check_fingerprint(entry, fingerprint)
+    metrics.IDEMPOTENT_REPLAYS.inc(scope)
+    return Response(
+        entry.body,
+        status_code=entry.status_code,
+        media_type="application/json",
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+async def _execute(db, ident, fingerprint, response_model, status_code, fn, args):
+    scope = ident[1]
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        lease, entry = await db.run(_claim, ident, fingerprint)
+        if entry is None:
+            break
+        if entry.status_code is not None:
+            _cache.set(ident, entry)
+            return _replay(entry, fingerprint, scope)
+        _check_fingerprint(entry, fingerprint)
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=409,
+                detail=f"A request with this {KEY_HEADER} is still in progress",
+            )
+        await asyncio.sleep(POLL_SECONDS)
+
+    claim = Claim(ident, lease, fingerprint, status_code, _adapter(response_model))
+    try:
+        entry = await db.run(_run, claim, fn, args)
+    except Exception:
+        # Nothing was written, so a retry may run it again. A cancelled
+        # request keeps its claim until the lease runs out: its worker
+        # thread may still commit.
+        await db.run(_release, claim)
+        raise
+    _cache.set(ident, entry)
+    return Response(
+        entry.body, status_code=status_code, media_type="application/json"
+    )
+
+
+async def idempotent(
+    request: Request,
+    db: DBRunner,
+    user_id: int,
+    scope: str,
+    payload: BaseModel,
+    response_model,
+    status_code: int,
+    fn,
+    *args,
+):
+    """Run ``fn(db, *args)`` at most once per ``Idempotency-Key`` header."""
+    key = request.headers.get(KEY_HEADER)
+    if key is None:
+        return await db.run(fn, *args)
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{KEY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters",
+        )
+
+    ident = (user_id, scope, key)
+    fingerprint = _fingerprint(payload)
+    while True:
+        entry = _cache.get(ident)
+        if entry is not None:
+            return _replay(entry, fingerprint, scope)
+        waiter = _in_flight.get(ident)
+        if waiter is None:
+            break
+        await asyncio.shield(waiter)
+
+    # Only touched from the event loop, so no lock is needed
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[ident] = future
+    try:
+        return await _execute(
+            db, ident, fingerprint, response_model, status_code, fn, args
+        )
+    finally:
+        del _in_flight[ident]
+        future.set_result(None)
+
+
+def purge_expired() -> int:
+    with SessionLocal() as db:
+        deleted = (
+            db.query(IdempotencyKey)
+            .filter(IdempotencyKey.expires_at <= datetime.utcnow())
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+    return deleted
+
+
+def stats() -> dict:
+    return {**_cache.stats(), "in_flight": len(_in_flight)}
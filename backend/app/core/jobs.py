@@ -0,0 +1,40 @@
+import logging
+import threading
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob(threading.Thread):
+    """Daemon thread that calls ``fn`` every ``interval`` seconds until stopped."""
+
+    def __init__(self, name: str, interval: float, fn: Callable[[], None]):
+        super().__init__(name=name, daemon=True)
+        self.interval = interval
+        self.fn = fn
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.fn()
+            except Exception:
+                logger.exception("Periodic job %s failed", self.name)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+_jobs: List[PeriodicJob] = []
+
+
+def start(name: str, interval: float, fn: Callable[[], None]) -> PeriodicJob:
+    job = PeriodicJob(name, interval, fn)
+    job.start()
+    _jobs.append(job)
+    return job
+
+
+def stop_all() -> None:
+    while _jobs:
+        _jobs.pop().stop()
@@ -0,0 +1,67 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def columns(model, schema) -> List:
+    """Columns of ``model`` named by ``schema``'s fields, for projected list queries."""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def paginate(
+    query: Query,
+    model,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = True,
+) -> dict:
+    """Keyset page over (created_at, id); cost is independent of page depth.
+
+    Column-projected queries come back as plain dicts, ready to serialize
+    without building ORM objects or validating response models.
+    """
+    key = tuple_(model.created_at, model.id)
+    if cursor:
+        position = decode_cursor(cursor)
+        query = query.filter(key < position if descending else key > position)
+        # Redundant with the row comparison, but lets MySQL prune partitions
+        bound = position[0]
+        query = query.filter(
+            model.created_at <= bound if descending else model.created_at >= bound
+        )
+
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    if not query.is_single_entity:
+        rows = [row._asdict() for row in rows]
+    return {"items": rows, "next_cursor": next_cursor}
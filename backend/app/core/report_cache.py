@@ -0,0 +1,299 @@
+"""Cached report responses with write-driven invalidation and ETags.
+
+Each entry remembers the version of the tags it depends on (``dues``,
+``merchant:<id>``). Writes bump those versions, so only the reports they
+touch stop matching. A report recomputed within
+``READ_REPLICA_MAX_LAG_SECONDS`` of a write to its tags reads the primary, so
+a lagging replica cannot cache pre-write data under the new version. The
+``memory`` store is per process; the ``sqlite`` store keeps entries and
+versions in a local file shared by every worker on the host, and requests
+reach it from the threadpool so a locked file never stalls the event loop.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+from typing import Optional, Sequence
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import (
+    DBRunner,
+    ReadDBRunner,
+    replicas,
+    run_primary,
+    run_read,
+)
+
+logger = logging.getLogger(__name__)
+
+DUES = "dues"
+
+Entry = namedtuple("Entry", ["etag", "body", "versions", "stored_at"])
+
+
+def merchant_tag(merchant_id: int) -> str:
+    # By id: names in URLs can differ in case from the stored one
+    return f"merchant:{merchant_id}"
+
+
+class MemoryStore:
+    blocking = False
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._entries = TTLCache(max_entries, ttl_seconds)
+        self._versions: dict = {}
+        self._bumped_at: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Entry]:
+        return self._entries.get(key)
+
+    def set(self, key: str, entry: Entry) -> None:
+        self._entries.set(key, entry)
+
+    def versions(self, tags: Sequence[str]) -> tuple:
+        """(version per tag, time of the latest bump among them)."""
+        versions = tuple(self._versions.get(tag, 0) for tag in tags)
+        bumped_at = (self._bumped_at.get(tag, 0.0) for tag in tags)
+        return versions, max(bumped_at, default=0.0)
+
+    def bump(self, tags: Sequence[str]) -> None:
+        now = time.time()
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+                self._bumped_at[tag] = now
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+class SQLiteStore:
+    """Entries and tag versions in a SQLite file, one connection per thread."""
+
+    blocking = True
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS report_entries (key TEXT PRIMARY KEY, "
+            "etag TEXT, body BLOB, versions TEXT, stored_at REAL, expires_at REAL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS report_tags (tag TEXT PRIMARY KEY, "
+            "version INTEGER NOT NULL, bumped_at REAL NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Entry]:
+        row = (
+            self._conn()
+            .execute(
+                "SELECT etag, body, versions, stored_at FROM report_entries "
+                "WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        etag, body, versions, stored_at = row
+        return Entry(etag, bytes(body), tuple(json.loads(versions)), stored_at)
+
+    def set(self, key: str, entry: Entry) -> None:
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO report_entries VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                entry.etag,
+                entry.body,
+                json.dumps(entry.versions),
+                entry.stored_at,
+                entry.stored_at + self.ttl_seconds,
+            ),
+        )
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            conn.execute(
+                "DELETE FROM report_entries WHERE expires_at <= ?", (time.time(),)
+            )
+            conn.execute(
+                "DELETE FROM report_entries WHERE key NOT IN (SELECT key FROM "
+                "report_entries ORDER BY stored_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def versions(self, tags: Sequence[str]) -> tuple:
+        """(version per tag, time of the latest bump among them)."""
+        placeholders = ",".join("?" * len(tags))
+        found = {
+            tag: (version, bumped_at)
+            for tag, version, bumped_at in self._conn().execute(
+                "SELECT tag, version, bumped_at FROM report_tags "
+                f"WHERE tag IN ({placeholders})",
+                tuple(tags),
+            )
+        }
+        versions = tuple(found.get(tag, (0, 0.0))[0] for tag in tags)
+        return versions, max((found[tag][1] for tag in found), default=0.0)
+
+    def bump(self, tags: Sequence[str]) -> None:
+        now = time.time()
+        self._conn().executemany(
+            "INSERT INTO report_tags VALUES (?, 1, ?) ON CONFLICT(tag) "
+            "DO UPDATE SET version = version + 1, bumped_at = excluded.bumped_at",
+            [(tag, now) for tag in tags],
+        )
+
+    def stats(self) -> dict:
+        query = "SELECT COUNT(*) FROM report_entries"
+        (size,) = self._conn().execute(query).fetchone()
+        return {"size": size, "hits": self.hits, "misses": self.misses}
+
+
+def _make_store():
+    if not settings.REPORT_CACHE_ENABLED:
+        return None
+    # Entries outlive their TTL by the stale window so they can still be served
+    lifetime = settings.REPORT_CACHE_TTL_SECONDS + settings.REPORT_CACHE_STALE_SECONDS
+    if settings.REPORT_CACHE_BACKEND == "sqlite":
+        return SQLiteStore(
+            settings.REPORT_CACHE_PATH, settings.REPORT_CACHE_MAX_ENTRIES, lifetime
+        )
+    return MemoryStore(settings.REPORT_CACHE_MAX_ENTRIES, lifetime)
+
+
+_store = _make_store()
+# key -> refresh task; also keeps the task referenced until it finishes
+_refreshing: dict = {}
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_model) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def _entry(response_model, value, versions: tuple) -> Entry:
+    adapter = _adapter(response_model)
+    body = adapter.dump_json(adapter.validate_python(value))
+    etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+    return Entry(etag, body, versions, time.time())
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def _respond(request: Request, entry: Entry) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+async def _call(method, *args):
+    if _store.blocking:
+        return await run_in_threadpool(method, *args)
+    return method(*args)
+
+
+def _read_primary(changed_at: float) -> bool:
+    # A replica may not have the write that moved the versions yet
+    lag = settings.READ_REPLICA_MAX_LAG_SECONDS
+    return bool(replicas.engines) and time.time() - changed_at < lag
+
+
+async def _revalidate(key, tags, response_model, fn, args) -> None:
+    try:
+        versions, changed_at = await _call(_store.versions, tags)
+        run = run_primary if _read_primary(changed_at) else run_read
+        value = await run_in_threadpool(run, fn, *args)
+        await _call(_store.set, key, _entry(response_model, value, versions))
+    except Exception:
+        logger.exception("Report cache refresh failed for %s", key)
+    finally:
+        _refreshing.pop(key, None)
+
+
+def _schedule_revalidate(key, tags, response_model, fn, args) -> None:
+    # Only touched from the event loop, so no lock is needed
+    if key not in _refreshing:
+        _refreshing[key] = asyncio.get_running_loop().create_task(
+            _revalidate(key, tags, response_model, fn, args)
+        )
+
+
+async def cached_report(
+    request: Request,
+    db: DBRunner,
+    response_model,
+    key: str,
+    tags: Sequence[str],
+    fn,
+    *args,
+) -> Response:
+    """Serve ``fn(db, *args)`` from the cache, recomputing when its tags moved."""
+    if _store is None:
+        value = await db.run(fn, *args)
+        return _respond(request, _entry(response_model, value, ()))
+
+    versions, changed_at = await _call(_store.versions, tags)
+    entry = await _call(_store.get, key)
+    if entry is not None:
+        age = time.time() - entry.stored_at
+        if entry.versions == versions and age < settings.REPORT_CACHE_TTL_SECONDS:
+            return _respond(request, entry)
+        if settings.REPORT_CACHE_STALE_SECONDS > 0:
+            _schedule_revalidate(key, tags, response_model, fn, args)
+            return _respond(request, entry)
+
+    # Versions are read before computing, so a write that lands meanwhile
+    # leaves this entry already stale rather than hiding the write
+    if isinstance(db, ReadDBRunner) and _read_primary(changed_at):
+        value = await run_in_threadpool(run_primary, fn, *args)
+    else:
+        value = await db.run(fn, *args)
+    entry = _entry(response_model, value, versions)
+    await _call(_store.set, key, entry)
+    return _respond(request, entry)
+
+
+def invalidate(*tags: str) -> None:
+    if _store is not None and tags:
+        _store.bump(tags)
+
+
+def stats() -> Optional[dict]:
+    return _store.stats() if _store is not None else None
@@ -0,0 +1,140 @@
+"""Per-request SQL statement counts, N+1 detection and a slow-query log.
+
+Enabled with SQL_PROFILER_ENABLED. Engine events add each statement to the
+profile of the request that issued it (a context variable the threadpool and
+``run_sync`` both inherit). Responses get ``X-DB-Queries`` and ``X-DB-Time``
+(milliseconds); slow statements and repeated statement shapes are logged as
+one JSON object per line on the ``app.sql`` logger.
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.sql")
+
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_IN_LIST = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\)")
+_SPACE = re.compile(r"\s+")
+# Repeats of these are per-transaction overhead, not an N+1 pattern
+_TRANSACTION_CONTROL = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+
+@lru_cache(maxsize=2048)
+def normalize(statement: str) -> str:
+    """Collapse literals and IN-lists so equivalent statements share one shape."""
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(?)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+class RequestProfile:
+    __slots__ = ("scope", "queries", "seconds", "shapes")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "")
+
+
+_profile: ContextVar[Optional[RequestProfile]] = ContextVar("sql_profile", default=None)
+
+
+def _log(event_name: str, profile: RequestProfile, **fields) -> None:
+    logger.warning(
+        json.dumps(
+            {
+                "event": event_name,
+                "method": profile.scope.get("method"),
+                "route": profile.route,
+                **fields,
+            }
+        )
+    )
+
+
+def install(sync_engine) -> None:
+    """Attach the statement listeners to an engine (the sync side of async ones)."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if _profile.get() is not None:
+            context._profile_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        profile = _profile.get()
+        if profile is None:
+            return
+        elapsed = time.perf_counter() - context._profile_started
+        shape = normalize(statement)
+        profile.queries += 1
+        profile.seconds += elapsed
+        if not shape.upper().startswith(_TRANSACTION_CONTROL):
+            profile.shapes[shape] += 1
+        if elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+            _log(
+                "slow_query",
+                profile,
+                duration_ms=round(elapsed * 1000, 3),
+                statement=shape,
+            )
+
+
+class SQLProfilerMiddleware:
+    """Profiles the statements each HTTP request issues."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(scope)
+        token = _profile.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(profile.queries).encode()))
+                headers.append(
+                    (b"x-db-time", f"{profile.seconds * 1000:.3f}".encode())
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _profile.reset(token)
+            repeated = [
+                {"statement": shape, "count": count}
+                for shape, count in profile.shapes.most_common(3)
+                if count >= settings.SQL_N_PLUS_ONE_THRESHOLD
+            ]
+            if repeated:
+                _log(
+                    "possible_n_plus_one",
+                    profile,
+                    queries=profile.queries,
+                    duration_ms=round(profile.seconds * 1000, 3),
+                    repeated=repeated,
+                )
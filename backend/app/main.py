@@ -1,10 +1,70 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from app.core import (
+    admission,
+    auth_cache,
+    idempotency,
+    jobs,
+    metrics,
+    report_cache,
+    sql_profiler,
+)
 from app.core.config import settings
-from app.api.routes import auth, users, merchants, transactions, paybacks, reports
+from app.core.database import async_engine, engine, replicas
+from app.services import (
+    directory_service,
+    partition_service,
+    rejection_service,
+    rollup_service,
+)
+from app.api.routes import (
+    auth,
+    users,
+    merchants,
+    transactions,
+    paybacks,
+    reports,
+    events,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    jobs.start(
+        "rejections",
+        settings.REJECTION_FLUSH_INTERVAL_SECONDS,
+        rejection_service.run_flush_job,
+    )
+    jobs.start(
+        "idempotency-purge",
+        settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS,
+        idempotency.purge_expired,
+    )
+    if settings.ROLLUP_JOB_ENABLED:
+        jobs.start(
+            "rollups", settings.ROLLUP_INTERVAL_SECONDS, rollup_service.run_rollup_job
+        )
+    if settings.PARTITION_MAINTENANCE_ENABLED:
+        jobs.start(
+            "partitions",
+            settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+            partition_service.run_partition_job,
+        )
+    if replicas.engines:
+        jobs.start(
+            "replica-health", settings.READ_REPLICA_CHECK_SECONDS, replicas.check
+        )
+    yield
+    jobs.stop_all()
+    # Write out declines queued since the last flush
+    rejection_service.run_flush_job()
+
 
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="A Pay-Later Service — Buy now, pay later with credit limits and merchant fee tracking.",
@@ -12,6 +72,10 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+# Added before CORS so shed requests still get CORS headers and are metered
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(admission.AdmissionMiddleware)
+
 # CORS Middleware — allow all origins for development
 app.add_middleware(
     CORSMiddleware,
@@ -20,6 +84,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+if settings.SQL_PROFILER_ENABLED:
+    sql_profiler.install(engine)
+    if async_engine is not None:
+        sql_profiler.install(async_engine.sync_engine)
+    app.add_middleware(sql_profiler.SQLProfilerMiddleware)
 
 # Include all routers
 app.include_router(auth.router)
@@ -28,6 +99,7 @@ app.include_router(merchants.router)
 app.include_router(transactions.router)
 app.include_router(paybacks.router)
 app.include_router(reports.router)
+app.include_router(events.router)
 
 
 @app.get("/", tags=["Health"])
@@ -40,4 +112,19 @@ def root():
 
 @app.get("/health", tags=["Health"])
 def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "auth_cache": auth_cache.stats(),
+        "directory_cache": directory_service.stats(),
+        "report_cache": report_cache.stats(),
+        "rejection_queue": rejection_service.pending(),
+        "idempotency_cache": idempotency.stats(),
+        "admission": admission.stats(),
+    }
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+def metrics_endpoint():
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
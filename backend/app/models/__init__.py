@@ -2,5 +2,26 @@ from app.models.user import User
 from app.models.merchant import Merchant
 from app.models.transaction import Transaction
 from app.models.payback import Payback
+from app.models.user_balance import UserBalance
+from app.models.import_checkpoint import ImportCheckpoint
+from app.models.rollup import MerchantRollup, UserRollup, RollupWatermark, RollupGap
+from app.models.rejection import TransactionRejection, RejectionCounter
+from app.models.idempotency_key import IdempotencyKey
+from app.models.ledger_event import LedgerEvent
 
-__all__ = ["User", "Merchant", "Transaction", "Payback"]
+__all__ = [
+    "User",
+    "Merchant",
+    "Transaction",
+    "Payback",
+    "UserBalance",
+    "ImportCheckpoint",
+    "MerchantRollup",
+    "UserRollup",
+    "RollupWatermark",
+    "RollupGap",
+    "TransactionRejection",
+    "RejectionCounter",
+    "IdempotencyKey",
+    "LedgerEvent",
+]
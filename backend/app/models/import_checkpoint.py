@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class ImportCheckpoint(Base):
+    __tablename__ = "import_checkpoints"
+
+    # Last source line committed for a named bulk import, so it can resume
+    name = Column(String(255), primary_key=True)
+    lines_done = Column(Integer, nullable=False, default=0)
+    completed_at = Column(DateTime, nullable=True)  # set once the whole file is in
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class LedgerEvent(Base):
+    __tablename__ = "ledger_events"
+
+    # Append-only change feed; id is the consumers' cursor
+    id = Column(Integer, primary_key=True)
+    type = Column(String(30), nullable=False)  # see event_service.EVENT_TYPES
+    user_id = Column(Integer, nullable=True)
+    merchant_id = Column(Integer, nullable=True)
+    amount = Column(Float, nullable=True)
+    data = Column(Text, nullable=False)  # JSON object with type-specific fields
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -6,6 +6,7 @@ from app.core.database import Base
 
 class Merchant(Base):
     __tablename__ = "merchants"
+    __table_args__ = (Index("ix_merchants_created_at", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), unique=True, nullable=False, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -6,10 +6,15 @@ from app.core.database import Base
 
 class Payback(Base):
     __tablename__ = "paybacks"
+    # Partitioned like transactions on MySQL; see the Transaction model
+    __table_args__ = (
+        Index("ix_paybacks_user_amount", "user_id", "amount"),
+        Index("ix_paybacks_user_created_at", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     amount = Column(Float, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
     user = relationship("User", back_populates="paybacks")
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class TransactionRejection(Base):
+    __tablename__ = "transaction_rejections"
+    # Append-only log of declined purchase attempts, kept out of the ledger.
+    # No foreign keys and a single index keep bulk inserts cheap.
+    __table_args__ = (
+        Index("ix_transaction_rejections_created_at", "created_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    merchant_id = Column(Integer, nullable=False)
+    amount = Column(Float, nullable=False)
+    reason = Column(String(100), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class RejectionCounter(Base):
+    __tablename__ = "rejection_counters"
+
+    # Declined attempts per user or merchant per day
+    scope = Column(String(10), primary_key=True)  # user | merchant
+    subject_id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    rejections = Column(Integer, nullable=False, default=0)
+    amount = Column(Float, nullable=False, default=0.0)
@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class MerchantRollup(Base):
+    __tablename__ = "merchant_rollups"
+
+    # One row per merchant per hour/day bucket of successful transactions
+    merchant_id = Column(Integer, primary_key=True)
+    granularity = Column(String(5), primary_key=True)  # hour | day
+    bucket_start = Column(DateTime, primary_key=True)
+    fee_total = Column(Float, nullable=False, default=0.0)
+    payout_total = Column(Float, nullable=False, default=0.0)
+    volume = Column(Float, nullable=False, default=0.0)
+    txn_count = Column(Integer, nullable=False, default=0)
+
+
+class UserRollup(Base):
+    __tablename__ = "user_rollups"
+
+    # One row per user per hour/day bucket of spend and paybacks
+    user_id = Column(Integer, primary_key=True)
+    granularity = Column(String(5), primary_key=True)  # hour | day
+    bucket_start = Column(DateTime, primary_key=True)
+    spend = Column(Float, nullable=False, default=0.0)
+    txn_count = Column(Integer, nullable=False, default=0)
+    paybacks = Column(Float, nullable=False, default=0.0)
+    payback_count = Column(Integer, nullable=False, default=0)
+
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+
+    # Highest source row id already folded into the rollups
+    source = Column(String(50), primary_key=True)  # transactions | paybacks
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class RollupGap(Base):
+    __tablename__ = "rollup_gaps"
+
+    # Id ranges the watermark moved past before they committed; their rows
+    # are folded when they appear
+    source = Column(String(50), primary_key=True)  # transactions | paybacks
+    first_id = Column(Integer, primary_key=True)
+    last_id = Column(Integer, nullable=False)
+    seen_at = Column(DateTime, nullable=False, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -6,6 +6,14 @@ from app.core.database import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    # On MySQL this table is range-partitioned by month on created_at, so its
+    # primary key is (id, created_at) and the foreign keys are not enforced
+    __table_args__ = (
+        Index("ix_transactions_user_status_amount", "user_id", "status", "amount"),
+        Index("ix_transactions_merchant_status_fee", "merchant_id", "status", "fee_amount"),
+        Index("ix_transactions_user_created_at", "user_id", "created_at", "id"),
+        Index("ix_transactions_created_at", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -15,7 +23,7 @@ class Transaction(Base):
     merchant_payout = Column(Float, nullable=False, default=0.0)
     status = Column(String(20), nullable=False, default="success")  # success | rejected
     rejection_reason = Column(String(100), nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
     user = relationship("User", back_populates="transactions")
     merchant = relationship("Merchant", back_populates="transactions")
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.core.database import Base
+
+
+class UserBalance(Base):
+    __tablename__ = "user_balances"
+
+    # Running ledger totals, updated alongside every purchase and payback
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    dues = Column(Float, nullable=False, default=0.0)
+    available_credit = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = relationship("User", back_populates="balance")
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+class EventResponse(BaseModel):
+    id: int
+    type: str  # purchase | purchase_rejected | payback | merchant_fee_changed
+    user_id: Optional[int] = None
+    merchant_id: Optional[int] = None
+    amount: Optional[float] = None
+    data: Dict[str, Any]
+    created_at: datetime
+
+
+class EventPage(BaseModel):
+    items: List[EventResponse]
+    next_cursor: int  # pass back as ``after``; unchanged when nothing is new
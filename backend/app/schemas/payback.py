@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Optional
 
 
 class PaybackCreate(BaseModel):
@@ -20,3 +21,19 @@ class PaybackResponse(BaseModel):
 class PaybackOut(BaseModel):
     user_name: str
     remaining_dues: float
+
+
+class PaybackImportLine(BaseModel):
+    line: int
+    user_name: Optional[str] = None
+    status: str  # applied | rejected
+    amount: Optional[float] = None
+    remaining_dues: Optional[float] = None
+    reason: Optional[str] = None
+
+
+class PaybackImportReport(BaseModel):
+    import_name: str
+    applied: int
+    rejected: int
+    results: List[PaybackImportLine]
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from datetime import datetime
 from typing import Dict
 
 
@@ -10,6 +11,33 @@ class DuesReport(BaseModel):
     dues: float
 
 
+class TransactionCount(BaseModel):
+    transactions: int
+
+
 class TotalDuesReport(BaseModel):
     total: float
     details: Dict[str, float]
+
+
+class FeeBucket(BaseModel):
+    bucket_start: datetime
+    fee_collected: float
+    merchant_payout: float
+    volume: float
+    transactions: int
+
+
+class UserActivityBucket(BaseModel):
+    bucket_start: datetime
+    spend: float
+    transactions: int
+    paybacks: float
+    payback_count: int
+
+
+class RejectionCount(BaseModel):
+    subject_id: int
+    name: str
+    rejections: int
+    amount: float
@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+MAX_BATCH_SIZE = 10000
 
 
 class TransactionCreate(BaseModel):
@@ -9,6 +11,10 @@ class TransactionCreate(BaseModel):
     amount: float
 
 
+class TransactionBatchCreate(BaseModel):
+    items: List[TransactionCreate] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
 class TransactionResponse(BaseModel):
     id: int
     user_id: int
@@ -24,6 +30,18 @@ class TransactionResponse(BaseModel):
         from_attributes = True
 
 
+class RejectionResponse(BaseModel):
+    id: int
+    user_id: int
+    merchant_id: int
+    amount: float
+    reason: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class TransactionStatusResponse(BaseModel):
     status: str
     reason: Optional[str] = None
@@ -1,41 +1,89 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from datetime import timedelta
 
 from app.models.user import User
+from app.models.user_balance import UserBalance
 from app.schemas.user import UserCreate
 from app.schemas.auth import LoginRequest, Token
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core import auth_cache, report_cache
+from app.core.database import DBRunner
+from app.core.security import (
+    verify_password_async,
+    get_password_hash_async,
+    password_needs_rehash,
+    create_access_token,
+)
 from app.core.config import settings
+from app.services import directory_service
 
 
-def register_user(db: Session, user_data: UserCreate) -> User:
+def check_registration(db: Session, user_data: UserCreate) -> None:
     if db.query(User).filter(User.email == user_data.email).first():
         raise HTTPException(status_code=400, detail="Email already registered")
 
     if db.query(User).filter(User.name == user_data.name).first():
         raise HTTPException(status_code=400, detail="Username already taken")
 
+
+def create_user(db: Session, user_data: UserCreate, hashed_password: str) -> User:
     user = User(
         name=user_data.name,
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=hashed_password,
         credit_limit=user_data.credit_limit,
     )
     db.add(user)
-    db.commit()
+    db.add(UserBalance(user=user, dues=0.0, available_credit=user.credit_limit))
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent registration took the email or name after the check
+        db.rollback()
+        check_registration(db, user_data)
+        raise
     db.refresh(user)
+    directory_service.invalidate_user(user.name)
+    report_cache.invalidate(report_cache.DUES)
     return user
 
 
-def authenticate_user(db: Session, email: str, password: str) -> User:
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.hashed_password):
+def get_user_by_email(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+
+def update_password_hash(db: Session, user: User, hashed_password: str) -> None:
+    user.hashed_password = hashed_password
+    db.commit()
+    # Reload inside the runner so callers never lazy-load the expired row
+    db.refresh(user)
+    auth_cache.invalidate_user(user.id)
+
+
+async def register_user(db: DBRunner, user_data: UserCreate) -> User:
+    # Reject duplicates before spending a bcrypt round on them
+    await db.run(check_registration, user_data)
+    hashed_password = await get_password_hash_async(user_data.password)
+    return await db.run(create_user, user_data, hashed_password)
+
+
+async def authenticate_user(db: DBRunner, email: str, password: str) -> User:
+    user = await db.run(get_user_by_email, email)
+    if not user or not await verify_password_async(password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
         )
+
+    if password_needs_rehash(user.hashed_password):
+        try:
+            new_hash = await get_password_hash_async(password)
+        except HTTPException:
+            # Hash pool is saturated; upgrade on a later login instead
+            return user
+        await db.run(update_password_hash, user, new_hash)
     return user
 
 
@@ -0,0 +1,64 @@
+from collections import namedtuple
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+from app.models.merchant import Merchant
+
+UserRef = namedtuple("UserRef", ["id", "name"])
+MerchantRef = namedtuple("MerchantRef", ["id", "name", "fee_percentage"])
+
+# Name -> id lookups for the write path. Local writes invalidate explicitly;
+# the TTL bounds how long other workers can serve a stale entry.
+_users = TTLCache(
+    settings.DIRECTORY_CACHE_MAX_ENTRIES, settings.DIRECTORY_CACHE_TTL_SECONDS
+)
+_merchants = TTLCache(
+    settings.DIRECTORY_CACHE_MAX_ENTRIES, settings.DIRECTORY_CACHE_TTL_SECONDS
+)
+
+
+def _key(name: str) -> str:
+    # MySQL's collation ignores case and trailing spaces, so every spelling
+    # that finds a row must share its entry and its invalidation
+    return name.rstrip().casefold()
+
+
+def resolve_user(db: Session, name: str) -> UserRef:
+    ref = _users.get(_key(name))
+    if ref is None:
+        row = db.query(User.id, User.name).filter(User.name == name).first()
+        if not row:
+            raise HTTPException(status_code=404, detail=f"User '{name}' not found")
+        ref = UserRef(*row)
+        _users.set(_key(name), ref)
+    return ref
+
+
+def resolve_merchant(db: Session, name: str) -> MerchantRef:
+    ref = _merchants.get(_key(name))
+    if ref is None:
+        row = (
+            db.query(Merchant.id, Merchant.name, Merchant.fee_percentage)
+            .filter(Merchant.name == name)
+            .first()
+        )
+        if not row:
+            raise HTTPException(status_code=404, detail=f"Merchant '{name}' not found")
+        ref = MerchantRef(*row)
+        _merchants.set(_key(name), ref)
+    return ref
+
+
+def invalidate_user(name: str) -> None:
+    _users.pop(_key(name))
+
+
+def invalidate_merchant(name: str) -> None:
+    _merchants.pop(_key(name))
+
+
+def stats() -> dict:
+    return {"users": _users.stats(), "merchants": _merchants.stats()}
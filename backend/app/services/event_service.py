@@ -0,0 +1,168 @@
+"""Append-only ledger change feed.
+
+Writers add events with ``record`` before their own commit, so an event is
+stored exactly when the change it describes is. Readers page by id. Ids are
+allocated at insert but only become visible at commit, which can happen out
+of order, so a page stops at the first missing id and the cursor waits there
+until it commits. A gap is only passed once this process has seen it for
+``EVENTS_GAP_TIMEOUT_SECONDS``, when the missing id was rolled back; timing it
+here avoids trusting the writers' clocks or when they stamped the event. Pages
+are read from the primary: a lagging replica can show a higher id before a lower
+one that committed just after it.
+"""
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+import orjson
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import run_primary
+from app.core.pagination import DEFAULT_PAGE_SIZE
+from app.models.ledger_event import LedgerEvent
+
+PURCHASE = "purchase"
+PURCHASE_REJECTED = "purchase_rejected"
+# Declines the rejection queue turned away; ``count`` says how many
+PURCHASE_REJECTIONS_DROPPED = "purchase_rejections_dropped"
+PAYBACK = "payback"
+MERCHANT_FEE_CHANGED = "merchant_fee_changed"
+EVENT_TYPES = (
+    PURCHASE,
+    PURCHASE_REJECTED,
+    PURCHASE_REJECTIONS_DROPPED,
+    PAYBACK,
+    MERCHANT_FEE_CHANGED,
+)
+
+# Shared by every waiting consumer in the process: one MAX(id) per interval
+_latest = TTLCache(1, settings.EVENTS_POLL_SECONDS)
+# First missing id of a gap -> monotonic time a page first stopped at it
+_gaps_seen = TTLCache(1000, settings.EVENTS_GAP_TIMEOUT_SECONDS * 2)
+
+
+def event(
+    type_: str,
+    user_id: Optional[int] = None,
+    merchant_id: Optional[int] = None,
+    amount: Optional[float] = None,
+    **data,
+) -> dict:
+    return dict(
+        type=type_,
+        user_id=user_id,
+        merchant_id=merchant_id,
+        amount=amount,
+        data=json.dumps(data, separators=(",", ":"), default=str),
+        created_at=datetime.utcnow(),
+    )
+
+
+def record(db: Session, events: List[dict]) -> None:
+    """Insert ``events`` into the caller's transaction; the caller commits."""
+    if events:
+        db.execute(insert(LedgerEvent), events)
+
+
+def _gap_expired(missing_id: int) -> bool:
+    now = time.monotonic()
+    seen_at = _gaps_seen.get(missing_id)
+    if seen_at is None:
+        _gaps_seen.set(missing_id, now)
+        return False
+    return now - seen_at >= settings.EVENTS_GAP_TIMEOUT_SECONDS
+
+
+def get_events(db: Session, after: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> dict:
+    rows = (
+        db.query(
+            LedgerEvent.id,
+            LedgerEvent.type,
+            LedgerEvent.user_id,
+            LedgerEvent.merchant_id,
+            LedgerEvent.amount,
+            LedgerEvent.data,
+            LedgerEvent.created_at,
+        )
+        .filter(LedgerEvent.id > after)
+        .order_by(LedgerEvent.id)
+        .limit(limit)
+        .all()
+    )
+    items = []
+    expected = after + 1
+    for row in rows:
+        if row.id != expected and not _gap_expired(expected):
+            break  # an earlier id may still be in flight
+        expected = row.id + 1
+        item = row._asdict()
+        # Already JSON; orjson embeds it without a parse/dump round trip
+        item["data"] = orjson.Fragment(row.data)
+        items.append(item)
+    return {"items": items, "next_cursor": items[-1]["id"] if items else after}
+
+
+def get_latest_id(db: Session) -> int:
+    return db.query(func.max(LedgerEvent.id)).scalar() or 0
+
+
+def _latest_id() -> int:
+    latest = _latest.get("id")
+    if latest is None:
+        latest = run_primary(get_latest_id)
+        _latest.set("id", latest)
+    return latest
+
+
+async def _fetch(after: int, limit: int) -> dict:
+    if await run_in_threadpool(_latest_id) <= after:
+        return {"items": [], "next_cursor": after}
+    return await run_in_threadpool(run_primary, get_events, after, limit)
+
+
+async def poll_events(after: int, limit: int, wait: float) -> dict:
+    """Next page after ``after``, waiting up to ``wait`` seconds for one."""
+    deadline = time.monotonic() + wait
+    while True:
+        page = await _fetch(after, limit)
+        if page["items"] or time.monotonic() >= deadline:
+            return page
+        await asyncio.sleep(settings.EVENTS_POLL_SECONDS)
+
+
+def _sse(item: dict) -> str:
+    data = orjson.dumps(item).decode("utf-8")
+    return f"id: {item['id']}\nevent: {item['type']}\ndata: {data}\n\n"
+
+
+async def stream_events(
+    after: int, is_disconnected: Callable[[], Awaitable[bool]]
+) -> AsyncIterator[str]:
+    """Server-sent events after ``after`` for up to ``EVENTS_STREAM_SECONDS``.
+
+    Clients reconnect with ``Last-Event-ID`` to continue where they left off.
+    """
+    yield f"retry: {int(settings.EVENTS_POLL_SECONDS * 1000)}\n\n"
+    started = last_write = time.monotonic()
+    while time.monotonic() - started < settings.EVENTS_STREAM_SECONDS:
+        if await is_disconnected():
+            return
+        page = await _fetch(after, settings.EVENTS_STREAM_BATCH)
+        for item in page["items"]:
+            yield _sse(item)
+        after = page["next_cursor"]
+        if len(page["items"]) == settings.EVENTS_STREAM_BATCH:
+            continue  # catching up; fetch the next batch straight away
+        now = time.monotonic()
+        if page["items"]:
+            last_write = now
+        elif now - last_write >= settings.EVENTS_KEEPALIVE_SECONDS:
+            yield ": keepalive\n\n"
+            last_write = now
+        await asyncio.sleep(settings.EVENTS_POLL_SECONDS)
@@ -1,11 +1,13 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from fastapi import HTTPException
-from typing import List
+from datetime import datetime
+from typing import Optional
 
+from app.core import report_cache
+from app.core.pagination import DEFAULT_PAGE_SIZE, columns, paginate
 from app.models.merchant import Merchant
-from app.models.transaction import Transaction
-from app.schemas.merchant import MerchantCreate, MerchantUpdate
+from app.schemas.merchant import MerchantCreate, MerchantResponse, MerchantUpdate
+from app.services import directory_service, event_service, rollup_service
 
 
 def create_merchant(db: Session, data: MerchantCreate) -> Merchant:
@@ -18,6 +20,7 @@ def create_merchant(db: Session, data: MerchantCreate) -> Merchant:
     db.add(merchant)
     db.commit()
     db.refresh(merchant)
+    directory_service.invalidate_merchant(merchant.name)
     return merchant
 
 
@@ -30,21 +33,38 @@ def get_merchant_by_name(db: Session, name: str) -> Merchant:
 
 def update_merchant_fee(db: Session, name: str, data: MerchantUpdate) -> Merchant:
     merchant = get_merchant_by_name(db, name)
+    previous = merchant.fee_percentage
     merchant.fee_percentage = data.fee_percentage
+    event_service.record(
+        db,
+        [
+            event_service.event(
+                event_service.MERCHANT_FEE_CHANGED,
+                merchant_id=merchant.id,
+                name=merchant.name,
+                fee_percentage=data.fee_percentage,
+                previous_fee_percentage=previous,
+            )
+        ],
+    )
     db.commit()
     db.refresh(merchant)
+    directory_service.invalidate_merchant(merchant.name)
+    report_cache.invalidate(report_cache.merchant_tag(merchant.id))
     return merchant
 
 
-def get_all_merchants(db: Session) -> List[Merchant]:
-    return db.query(Merchant).all()
+def get_all_merchants(
+    db: Session, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+) -> dict:
+    query = db.query(*columns(Merchant, MerchantResponse))
+    return paginate(query, Merchant, cursor, limit, descending=False)
 
 
-def calculate_fee_collected(db: Session, merchant_id: int) -> float:
-    total = (
-        db.query(func.sum(Transaction.fee_amount))
-        .filter(Transaction.merchant_id == merchant_id, Transaction.status == "success")
-        .scalar()
-        or 0.0
-    )
-    return total
+def calculate_fee_collected(
+    db: Session,
+    merchant_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> float:
+    return rollup_service.merchant_fee_total(db, merchant_id, start, end)
@@ -0,0 +1,169 @@
+"""Monthly partition maintenance for the MySQL ledger tables.
+
+``transactions`` and ``paybacks`` are range-partitioned on ``created_at``
+with one ``pYYYYMM`` partition per month and a ``pfuture`` catch-all. New
+months are split out of ``pfuture`` ahead of time; aged months are moved
+into compressed archive tables (or gzip NDJSON files) and dropped.
+
+Archived rows leave the live tables, so only months the rollup job has
+already folded are archived. Reports and ``rebuild_user_balance`` read those
+months from the rollups; queries over the raw ledger no longer see them.
+"""
+import gzip
+import json
+import os
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.rollup_service import get_folded_through
+
+PARTITIONED_TABLES = ("transactions", "paybacks")
+FUTURE = "pfuture"
+
+
+def _month(ts: datetime) -> datetime:
+    return datetime(ts.year, ts.month, 1)
+
+
+def _add_months(month: datetime, n: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _partition_month(name: str) -> Optional[datetime]:
+    if name == FUTURE:
+        return None
+    return datetime.strptime(name[1:], "%Y%m")
+
+
+def _require_mysql(db: Session) -> None:
+    if db.get_bind().dialect.name != "mysql":
+        raise HTTPException(
+            status_code=400, detail="Partition maintenance requires MySQL"
+        )
+
+
+def list_partitions(db: Session, table: str) -> List[Tuple[str, int]]:
+    """(partition name, approximate row count) in range order."""
+    _require_mysql(db)
+    return [
+        (name, rows or 0)
+        for name, rows in db.execute(
+            text(
+                "SELECT PARTITION_NAME, TABLE_ROWS FROM information_schema.PARTITIONS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table "
+                "AND PARTITION_NAME IS NOT NULL ORDER BY PARTITION_ORDINAL_POSITION"
+            ),
+            {"table": table},
+        )
+    ]
+
+
+def ensure_future_partitions(
+    db: Session, months_ahead: int = settings.PARTITION_MONTHS_AHEAD
+) -> dict:
+    """Split months up to ``months_ahead`` past the current one out of pfuture."""
+    _require_mysql(db)
+    target = _add_months(_month(datetime.utcnow()), months_ahead)
+    created = {}
+    for table in PARTITIONED_TABLES:
+        months = [
+            _partition_month(name)
+            for name, _ in list_partitions(db, table)
+            if name != FUTURE
+        ]
+        month = _add_months(max(months), 1) if months else _month(datetime.utcnow())
+        parts = []
+        while month <= target:
+            upper = _add_months(month, 1)
+            parts.append(
+                f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{upper:%Y-%m-%d}')"
+            )
+            month = upper
+        if parts:
+            parts.append(f"PARTITION {FUTURE} VALUES LESS THAN (MAXVALUE)")
+            db.execute(
+                text(
+                    f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE} "
+                    f"INTO ({', '.join(parts)})"
+                )
+            )
+        created[table] = len(parts) - 1 if parts else 0
+    return created
+
+
+def _archive_to_table(db: Session, table: str, partition: str) -> str:
+    archive = f"{table}_archive_{partition[1:]}"
+    db.execute(text(f"CREATE TABLE {archive} LIKE {table}"))
+    db.execute(text(f"ALTER TABLE {archive} REMOVE PARTITIONING"))
+    # The swap is a metadata operation; compression rebuilds only the archive
+    db.execute(
+        text(
+            f"ALTER TABLE {table} EXCHANGE PARTITION {partition} "
+            f"WITH TABLE {archive}"
+        )
+    )
+    db.execute(text(f"ALTER TABLE {archive} ROW_FORMAT=COMPRESSED"))
+    return archive
+
+
+def _archive_to_file(db: Session, table: str, partition: str, out_dir: str) -> str:
+    path = os.path.join(out_dir, f"{table}_{partition[1:]}.ndjson.gz")
+    query = text(f"SELECT * FROM {table} PARTITION ({partition}) ORDER BY id")
+    result = db.execute(query.execution_options(yield_per=5000))
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for row in result.mappings():
+            f.write(json.dumps(dict(row), default=str) + "\n")
+    return path
+
+
+def archive_partitions(
+    db: Session, older_than_months: int, out_dir: Optional[str] = None
+) -> List[dict]:
+    """Move whole months older than ``older_than_months`` out of the live tables.
+
+    Each month goes to a ``<table>_archive_YYYYMM`` table with compressed rows,
+    or to ``<out_dir>/<table>_YYYYMM.ndjson.gz``, before its partition is
+    dropped. Months holding rows the rollup job has not folded are skipped.
+    """
+    _require_mysql(db)
+    cutoff = _add_months(_month(datetime.utcnow()), -older_than_months)
+    archived = []
+    for table in PARTITIONED_TABLES:
+        # Below any gap still waiting to be folded, not just the watermark
+        folded_through = get_folded_through(db, table)
+        for name, _ in list_partitions(db, table):
+            month = _partition_month(name)
+            if month is None or month >= cutoff:
+                continue
+            max_id = db.execute(
+                text(f"SELECT MAX(id) FROM {table} PARTITION ({name})")
+            ).scalar()
+            if max_id is not None and max_id > folded_through:
+                continue
+            if out_dir:
+                target = _archive_to_file(db, table, name, out_dir)
+            else:
+                target = _archive_to_table(db, table, name)
+            db.execute(text(f"ALTER TABLE {table} DROP PARTITION {name}"))
+            archived.append(
+                {"table": table, "partition": name, "archived_to": target}
+            )
+    return archived
+
+
+def run_partition_job() -> None:
+    with SessionLocal() as db:
+        ensure_future_partitions(db)
+        if settings.PARTITION_ARCHIVE_AFTER_MONTHS > 0:
+            archive_partitions(
+                db,
+                settings.PARTITION_ARCHIVE_AFTER_MONTHS,
+                settings.PARTITION_ARCHIVE_DIR or None,
+            )
@@ -0,0 +1,228 @@
+import csv
+import hashlib
+import io
+import json
+from datetime import datetime
+from typing import BinaryIO, Iterable, Iterator, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core import report_cache
+from app.core.config import settings
+from app.models.import_checkpoint import ImportCheckpoint
+from app.models.payback import Payback
+from app.models.user import User
+from app.models.user_balance import UserBalance
+from app.services import event_service
+from app.services.user_service import get_user_balance, apply_payback
+
+
+def _parse_csv(lines: Iterable[str]) -> Iterator[dict]:
+    reader = csv.DictReader(lines)
+    for row in reader:
+        record = {"line": reader.line_num, "user_name": row.get("user_name")}
+        try:
+            record["amount"] = float(row.get("amount"))
+        except (TypeError, ValueError):
+            record["error"] = "invalid amount"
+        yield record
+
+
+def _parse_ndjson(lines: Iterable[str]) -> Iterator[dict]:
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            yield {
+                "line": line_no,
+                "user_name": row.get("user_name"),
+                "amount": float(row["amount"]),
+            }
+        except (ValueError, TypeError, KeyError, AttributeError):
+            yield {"line": line_no, "user_name": None, "error": "invalid record"}
+
+
+def content_name(source: BinaryIO) -> str:
+    """Default import name: the file's hash, so a new file never resumes an old one."""
+    digest = hashlib.sha256()
+    for block in iter(lambda: source.read(1 << 20), b""):
+        digest.update(block)
+    source.seek(0)
+    return f"sha256:{digest.hexdigest()}"
+
+
+def _check_open(checkpoint: ImportCheckpoint) -> None:
+    if checkpoint.completed_at is not None:
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                f"Import '{checkpoint.name}' already completed; "
+                "use a new import name"
+            ),
+        )
+
+
+def _get_checkpoint(db: Session, import_name: str) -> ImportCheckpoint:
+    checkpoint = db.get(ImportCheckpoint, import_name)
+    if checkpoint is None:
+        checkpoint = ImportCheckpoint(name=import_name, lines_done=0)
+        db.add(checkpoint)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another run of the same import created it first
+            db.rollback()
+            checkpoint = db.get(ImportCheckpoint, import_name)
+    _check_open(checkpoint)
+    return checkpoint
+
+
+def _lock_checkpoint(db: Session, import_name: str) -> ImportCheckpoint:
+    checkpoint = (
+        db.query(ImportCheckpoint)
+        .filter(ImportCheckpoint.name == import_name)
+        .with_for_update()
+        .populate_existing()
+        .one()
+    )
+    _check_open(checkpoint)
+    return checkpoint
+
+
+def _complete(db: Session, import_name: str) -> None:
+    db.query(ImportCheckpoint).filter(ImportCheckpoint.name == import_name).update(
+        {ImportCheckpoint.completed_at: datetime.utcnow()}
+    )
+    db.commit()
+
+
+def _apply_chunk(db: Session, import_name: str, chunk: List[dict]) -> List[dict]:
+    # Held until the chunk commits, so overlapping runs of one import take
+    # turns and each skips the lines the other has already applied
+    done = _lock_checkpoint(db, import_name).lines_done
+    chunk = [record for record in chunk if record["line"] > done]
+    if not chunk:
+        db.rollback()
+        return []
+
+    names = {r["user_name"] for r in chunk if "error" not in r}
+    users = {
+        name: (user_id, credit_limit)
+        for name, user_id, credit_limit in db.query(
+            User.name, User.id, User.credit_limit
+        ).filter(User.name.in_(names))
+    }
+    # One locked read of every affected balance, then clamp in file order
+    balances = {
+        balance.user_id: balance
+        for balance in db.query(UserBalance)
+        .filter(UserBalance.user_id.in_({user_id for user_id, _ in users.values()}))
+        .order_by(UserBalance.user_id)
+        .with_for_update()
+    }
+
+    rows = []
+    events = []
+    results = []
+    now = datetime.utcnow()
+    for record in chunk:
+        result = {"line": record["line"], "user_name": record["user_name"]}
+        results.append(result)
+        user_id, credit_limit = users.get(record["user_name"], (None, None))
+        if "error" in record:
+            reason = record["error"]
+        elif user_id is None:
+            reason = "unknown user"
+        elif record["amount"] <= 0:
+            reason = "amount must be positive"
+        else:
+            balance = balances.get(user_id)
+            if balance is None:
+                balance = balances[user_id] = get_user_balance(db, user_id)
+            reason = "no outstanding dues" if balance.dues <= 0 else None
+
+        if reason:
+            result.update(status="rejected", reason=reason)
+            continue
+
+        amount = min(record["amount"], balance.dues)
+        apply_payback(balance, amount, credit_limit)
+        rows.append({"user_id": user_id, "amount": amount, "created_at": now})
+        events.append(
+            event_service.event(
+                event_service.PAYBACK,
+                user_id,
+                amount=amount,
+                remaining_dues=balance.dues,
+            )
+        )
+        result.update(status="applied", amount=amount, remaining_dues=balance.dues)
+
+    if rows:
+        db.execute(insert(Payback), rows)
+        event_service.record(db, events)
+    # The checkpoint moves in the same commit as the chunk it covers, and only
+    # from the value read under the lock
+    moved = (
+        db.query(ImportCheckpoint)
+        .filter(
+            ImportCheckpoint.name == import_name, ImportCheckpoint.lines_done == done
+        )
+        .update({ImportCheckpoint.lines_done: chunk[-1]["line"]})
+    )
+    if moved != 1:
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail=f"Import '{import_name}' is being run concurrently; retry it",
+        )
+    db.commit()
+    if rows:
+        report_cache.invalidate(report_cache.DUES)
+    return results
+
+
+def import_paybacks(
+    db: Session,
+    lines: Iterable[str],
+    fmt: str,
+    import_name: str,
+    chunk_size: int = settings.PAYBACK_IMPORT_CHUNK_SIZE,
+) -> Iterator[dict]:
+    """Apply a settlement file chunk by chunk, yielding one result per line.
+
+    Re-running an unfinished import with the same ``import_name`` skips lines
+    already committed; a finished one is refused with ``409``.
+    """
+    done = _get_checkpoint(db, import_name).lines_done
+    records = _parse_csv(lines) if fmt == "csv" else _parse_ndjson(lines)
+
+    chunk = []
+    for record in records:
+        if record["line"] <= done:
+            continue
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield from _apply_chunk(db, import_name, chunk)
+            chunk = []
+    if chunk:
+        yield from _apply_chunk(db, import_name, chunk)
+    _complete(db, import_name)
+
+
+def run_payback_import(
+    db: Session, source: BinaryIO, fmt: str, import_name: Optional[str] = None
+) -> dict:
+    import_name = import_name or content_name(source)
+    lines = io.TextIOWrapper(source, encoding="utf-8", newline="")
+    results = list(import_paybacks(db, lines, fmt, import_name))
+    applied = sum(1 for r in results if r["status"] == "applied")
+    return {
+        "import_name": import_name,
+        "applied": applied,
+        "rejected": len(results) - applied,
+        "results": results,
+    }
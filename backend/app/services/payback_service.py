@@ -2,29 +2,54 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from typing import List
 
+from app.core import idempotency, report_cache
+from app.core.database import run_with_lock_retry
 from app.models.payback import Payback
 from app.schemas.payback import PaybackCreate, PaybackOut
-from app.services.user_service import get_user_by_name, calculate_user_dues
+from app.services import event_service
+from app.services.user_service import get_user_balance, apply_payback
+from app.services.directory_service import resolve_user
 
 
 def create_payback(db: Session, data: PaybackCreate) -> PaybackOut:
-    user = get_user_by_name(db, data.user_name)
-    current_dues = calculate_user_dues(db, user.id)
+    user = resolve_user(db, data.user_name)
+    return run_with_lock_retry(db, _record_payback, user, data.amount)
 
-    if data.amount <= 0:
+
+def _record_payback(db: Session, user, amount: float) -> PaybackOut:
+    # Row lock on just this user's balance until commit
+    balance = get_user_balance(db, user.id, for_update=True)
+    current_dues = balance.dues
+
+    if amount <= 0:
         raise HTTPException(status_code=400, detail="Payback amount must be positive")
 
     if current_dues <= 0:
         raise HTTPException(status_code=400, detail="No outstanding dues")
 
-    actual_amount = min(data.amount, current_dues)
+    actual_amount = min(amount, current_dues)
 
     payback = Payback(user_id=user.id, amount=actual_amount)
     db.add(payback)
+    apply_payback(balance, actual_amount, balance.user.credit_limit)
+    remaining = balance.dues
+    event_service.record(
+        db,
+        [
+            event_service.event(
+                event_service.PAYBACK,
+                user.id,
+                amount=actual_amount,
+                remaining_dues=remaining,
+            )
+        ],
+    )
+    response = PaybackOut(user_name=user.name, remaining_dues=remaining)
+    idempotency.record(db, response)
     db.commit()
+    report_cache.invalidate(report_cache.DUES)
 
-    remaining = calculate_user_dues(db, user.id)
-    return PaybackOut(user_name=user.name, remaining_dues=remaining)
+    return response
 
 
 def get_user_paybacks(db: Session, user_id: int) -> List[Payback]:
@@ -0,0 +1,280 @@
+"""Batched, asynchronous log of declined purchase attempts.
+
+Declines are queued in memory by the request and written by a background
+flusher many rows per INSERT, together with per-user and per-merchant daily
+counters, so a burst of declines never touches the ``transactions`` table.
+Each flush also writes a ``purchase_rejected`` ledger event per decline in
+the same commit, so the event feed sees declines at most once and only after
+they reach the log. Declines turned away by a full queue are not logged, but
+the next flush writes one ``purchase_rejections_dropped`` event with their
+count. Entries still queued when a process dies without a clean shutdown are
+lost, with no event.
+"""
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import SessionLocal, upsert_increment
+from app.core.pagination import DEFAULT_PAGE_SIZE, columns, paginate
+from app.models.merchant import Merchant
+from app.models.rejection import RejectionCounter, TransactionRejection
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.schemas.transaction import RejectionResponse
+from app.services import event_service
+from app.services.rollup_service import floor_bucket
+from app.services.user_service import get_user_by_name
+
+SCOPES = ("user", "merchant")
+COUNTER_KEY = ("scope", "subject_id", "bucket_start")
+
+_queue: deque = deque()
+_flush_lock = threading.Lock()
+# [count, amount] of declines dropped since the last flush
+_dropped = [0, 0.0]
+_dropped_lock = threading.Lock()
+
+
+def record(user_id: int, merchant_id: int, amount: float, reason: str) -> None:
+    """Queue a declined attempt for the next flush."""
+    if len(_queue) >= settings.REJECTION_QUEUE_MAX:
+        metrics.REJECTIONS_DROPPED.inc()
+        with _dropped_lock:
+            _dropped[0] += 1
+            _dropped[1] += amount
+        return
+    _queue.append(
+        dict(
+            user_id=user_id,
+            merchant_id=merchant_id,
+            amount=amount,
+            reason=reason,
+            created_at=datetime.utcnow(),
+        )
+    )
+
+
+def _counter_rows(rows: List[dict]) -> List[dict]:
+    totals = defaultdict(lambda: [0, 0.0])
+    for row in rows:
+        day = floor_bucket(row["created_at"], "day")
+        for scope in SCOPES:
+            total = totals[(scope, row[f"{scope}_id"], day)]
+            total[0] += 1
+            total[1] += row["amount"]
+    # Key order keeps concurrent flushers from deadlocking on counter rows
+    return [
+        dict(
+            scope=scope,
+            subject_id=subject_id,
+            bucket_start=day,
+            rejections=count,
+            amount=round(amount, 2),
+        )
+        for (scope, subject_id, day), (count, amount) in sorted(totals.items())
+    ]
+
+
+def _events(rows: List[dict]) -> List[dict]:
+    # Stamped at flush, next to their insert; the feed times id gaps from it
+    return [
+        event_service.event(
+            event_service.PURCHASE_REJECTED,
+            row["user_id"],
+            row["merchant_id"],
+            row["amount"],
+            reason=row["reason"],
+            attempted_at=row["created_at"].isoformat(),
+        )
+        for row in rows
+    ]
+
+
+def _take_dropped() -> tuple:
+    with _dropped_lock:
+        count, amount = _dropped
+        _dropped[:] = [0, 0.0]
+    return count, amount
+
+
+def _restore_dropped(count: int, amount: float) -> None:
+    with _dropped_lock:
+        _dropped[0] += count
+        _dropped[1] += amount
+
+
+def flush(max_rows: int = settings.REJECTION_FLUSH_BATCH) -> int:
+    """Write up to ``max_rows`` queued declines; returns how many were written."""
+    with _flush_lock:
+        rows = []
+        while _queue and len(rows) < max_rows:
+            rows.append(_queue.popleft())
+        dropped, dropped_amount = _take_dropped()
+        if not rows and not dropped:
+            return 0
+        events = _events(rows)
+        if dropped:
+            events.append(
+                event_service.event(
+                    event_service.PURCHASE_REJECTIONS_DROPPED,
+                    amount=round(dropped_amount, 2),
+                    count=dropped,
+                )
+            )
+        try:
+            with SessionLocal() as db:
+                if rows:
+                    db.execute(insert(TransactionRejection), rows)
+                upsert_increment(db, RejectionCounter, _counter_rows(rows), COUNTER_KEY)
+                event_service.record(db, events)
+                db.commit()
+        except Exception:
+            # Put them back in order so the next run retries them
+            _queue.extendleft(reversed(rows))
+            _restore_dropped(dropped, dropped_amount)
+            raise
+        return len(rows)
+
+
+def run_flush_job() -> None:
+    # Stop once a short batch shows the queue has been caught up
+    while flush() == settings.REJECTION_FLUSH_BATCH:
+        pass
+
+
+def pending() -> int:
+    return len(_queue)
+
+
+def _queue_metrics():
+    yield (
+        "paylater_rejections_pending",
+        "gauge",
+        "Rejected purchases queued for the rejection log.",
+        [({}, len(_queue))],
+    )
+
+
+metrics.register_collector(_queue_metrics)
+
+
+def move_ledger_rejections(
+    db: Session, batch_size: int = settings.REJECTION_FLUSH_BATCH
+) -> int:
+    """Move declines stored as ``transactions`` rows into the rejection log.
+
+    Each batch moves in its own commit, so a run can be stopped and repeated.
+    """
+    moved = 0
+    while True:
+        rows = db.execute(
+            select(
+                Transaction.id,
+                Transaction.user_id,
+                Transaction.merchant_id,
+                Transaction.amount,
+                Transaction.rejection_reason,
+                Transaction.created_at,
+            )
+            .where(Transaction.status == "rejected")
+            .order_by(Transaction.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return moved
+        log = [
+            dict(
+                user_id=row.user_id,
+                merchant_id=row.merchant_id,
+                amount=row.amount,
+                reason=row.rejection_reason or "credit limit",
+                created_at=row.created_at or datetime.utcnow(),
+            )
+            for row in rows
+        ]
+        db.execute(insert(TransactionRejection), log)
+        upsert_increment(db, RejectionCounter, _counter_rows(log), COUNTER_KEY)
+        db.execute(delete(Transaction).where(Transaction.id.in_([r.id for r in rows])))
+        db.commit()
+        moved += len(rows)
+
+
+def get_rejections(
+    db: Session, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+) -> dict:
+    query = db.query(*columns(TransactionRejection, RejectionResponse))
+    return paginate(query, TransactionRejection, cursor, limit)
+
+
+def get_user_rejection_count(
+    db: Session,
+    user_name: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> dict:
+    """One user's declines on the days touching [start, end), from the counters."""
+    user = get_user_by_name(db, user_name)
+    query = db.query(
+        func.sum(RejectionCounter.rejections), func.sum(RejectionCounter.amount)
+    ).filter(RejectionCounter.scope == "user", RejectionCounter.subject_id == user.id)
+    if start is not None:
+        query = query.filter(
+            RejectionCounter.bucket_start >= floor_bucket(start, "day")
+        )
+    if end is not None:
+        query = query.filter(RejectionCounter.bucket_start < end)
+    rejections, amount = query.one()
+    return {
+        "subject_id": user.id,
+        "name": user.name,
+        "rejections": rejections or 0,
+        "amount": round(amount or 0.0, 2),
+    }
+
+
+def get_rejection_counts(
+    db: Session,
+    scope: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 20,
+) -> List[dict]:
+    """Users or merchants with the most declines on the days touching [start, end)."""
+    model = User if scope == "user" else Merchant
+    total = func.sum(RejectionCounter.rejections)
+    query = (
+        db.query(
+            RejectionCounter.subject_id,
+            model.name,
+            total,
+            func.sum(RejectionCounter.amount),
+        )
+        .join(model, model.id == RejectionCounter.subject_id)
+        .filter(RejectionCounter.scope == scope)
+    )
+    if start is not None:
+        query = query.filter(
+            RejectionCounter.bucket_start >= floor_bucket(start, "day")
+        )
+    if end is not None:
+        query = query.filter(RejectionCounter.bucket_start < end)
+    rows = (
+        query.group_by(RejectionCounter.subject_id, model.name)
+        .order_by(total.desc(), RejectionCounter.subject_id)
+        .limit(limit)
+    )
+    return [
+        {
+            "subject_id": subject_id,
+            "name": name,
+            "rejections": rejections,
+            "amount": round(amount or 0.0, 2),
+        }
+        for subject_id, name, rejections, amount in rows
+    ]
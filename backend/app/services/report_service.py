@@ -1,26 +1,62 @@
 from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional
 
+from app.services import rollup_service
 from app.services.merchant_service import get_merchant_by_name, calculate_fee_collected
 from app.services.user_service import (
     get_user_by_name,
     calculate_user_dues,
+    count_user_transactions,
     get_users_at_credit_limit,
     get_total_dues,
 )
 
 
-def get_merchant_fee_report(db: Session, merchant_name: str) -> dict:
+def get_merchant_fee_report(
+    db: Session,
+    merchant_name: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> dict:
     merchant = get_merchant_by_name(db, merchant_name)
-    fee = calculate_fee_collected(db, merchant.id)
+    fee = calculate_fee_collected(db, merchant.id, start, end)
     return {"fee_collected": fee}
 
 
+def get_merchant_fee_breakdown(
+    db: Session,
+    merchant_name: str,
+    granularity: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[dict]:
+    merchant = get_merchant_by_name(db, merchant_name)
+    return rollup_service.merchant_breakdown(db, merchant.id, granularity, start, end)
+
+
 def get_user_dues_report(db: Session, user_name: str) -> dict:
     user = get_user_by_name(db, user_name)
     dues = calculate_user_dues(db, user.id)
     return {"dues": dues}
 
 
+def get_user_transaction_count_report(db: Session, user_name: str) -> dict:
+    user = get_user_by_name(db, user_name)
+    return {"transactions": count_user_transactions(db, user.id)}
+
+
+def get_user_activity_report(
+    db: Session,
+    user_name: str,
+    granularity: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[dict]:
+    user = get_user_by_name(db, user_name)
+    return rollup_service.user_activity(db, user.id, granularity, start, end)
+
+
 def get_users_at_limit_report(db: Session):
     return get_users_at_credit_limit(db)
 
@@ -0,0 +1,520 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import and_, delete, exists, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, upsert_increment
+from app.models.payback import Payback
+from app.models.rollup import MerchantRollup, RollupGap, RollupWatermark, UserRollup
+from app.models.transaction import Transaction
+
+GRANULARITIES = ("hour", "day")
+MERCHANT_KEY = ("merchant_id", "granularity", "bucket_start")
+USER_KEY = ("user_id", "granularity", "bucket_start")
+# Unfolded rows fetched per round trip when merging them into bucket reports
+PENDING_BATCH = 5000
+
+
+def floor_bucket(ts: datetime, granularity: str) -> datetime:
+    ts = ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0) if granularity == "day" else ts
+
+
+def _ceil_day(ts: datetime) -> datetime:
+    day = floor_bucket(ts, "day")
+    return day if day == ts else day + timedelta(days=1)
+
+
+def _lock_watermark(db: Session, source: str) -> RollupWatermark:
+    # Row lock serializes concurrent workers so a batch is never folded twice
+    watermark = (
+        db.query(RollupWatermark)
+        .filter(RollupWatermark.source == source)
+        .with_for_update()
+        .first()
+    )
+    if watermark is None:
+        watermark = RollupWatermark(source=source, last_id=0)
+        db.add(watermark)
+        db.flush()
+    return watermark
+
+
+def get_watermark(db: Session, source: str) -> int:
+    last_id = (
+        db.query(RollupWatermark.last_id)
+        .filter(RollupWatermark.source == source)
+        .scalar()
+    )
+    return last_id or 0
+
+
+def _in_gap(model, source: str):
+    return exists().where(
+        RollupGap.source == source,
+        RollupGap.first_id <= model.id,
+        RollupGap.last_id >= model.id,
+    )
+
+
+def get_folded_through(db: Session, source: str) -> int:
+    """Highest id at or below which every row has been folded."""
+    oldest_gap = (
+        db.query(func.min(RollupGap.first_id))
+        .filter(RollupGap.source == source)
+        .scalar()
+    )
+    watermark = get_watermark(db, source)
+    return watermark if oldest_gap is None else min(watermark, oldest_gap - 1)
+
+
+def _unfolded(model, source: str, watermark: int):
+    """Filter for rows not folded yet: past the watermark or still in a gap."""
+    return or_(model.id > watermark, _in_gap(model, source))
+
+
+def _split_gaps(gaps: list, filled_ids: List[int]) -> tuple:
+    """(ranges that got rows, what is left of them) once ``filled_ids`` folded."""
+    touched, left = [], []
+    for first_id, last_id, seen_at in gaps:
+        inside = [i for i in filled_ids if first_id <= i <= last_id]
+        if not inside:
+            continue
+        touched.append(first_id)
+        lo = first_id
+        for row_id in inside:
+            if row_id > lo:
+                left.append((lo, row_id - 1, seen_at))
+            lo = row_id + 1
+        if lo <= last_id:
+            left.append((lo, last_id, seen_at))
+    return touched, left
+
+
+def user_net_spend(db: Session, user_id: int) -> float:
+    """Successful spend minus paybacks for one user, over the whole ledger.
+
+    Folded rows come from the rollups and the rest from the ledger, so the
+    total still covers months archived out of the ledger tables.
+    """
+    spend, paid = (
+        db.query(func.sum(UserRollup.spend), func.sum(UserRollup.paybacks))
+        .filter(UserRollup.user_id == user_id, UserRollup.granularity == "day")
+        .one()
+    )
+    pending_spend = (
+        db.query(func.sum(Transaction.amount))
+        .filter(
+            _unfolded(
+                Transaction, "transactions", get_watermark(db, "transactions")
+            ),
+            Transaction.user_id == user_id,
+            Transaction.status == "success",
+        )
+        .scalar()
+    )
+    pending_paid = (
+        db.query(func.sum(Payback.amount))
+        .filter(
+            _unfolded(Payback, "paybacks", get_watermark(db, "paybacks")),
+            Payback.user_id == user_id,
+        )
+        .scalar()
+    )
+    spent = (spend or 0.0) + (pending_spend or 0.0)
+    return spent - (paid or 0.0) - (pending_paid or 0.0)
+
+
+def _next_rows(db: Session, source: str, model, columns) -> list:
+    """Rows to fold: rows inside gaps that have since committed, then the next batch.
+
+    Ids are allocated at insert but become visible at commit, which can happen
+    out of order. Id ranges the batch skips over are kept as gaps, however
+    long, and their rows are folded once they show up. A gap is dropped after
+    ``ROLLUP_GAP_TIMEOUT_SECONDS``, by when its ids were rolled back or never
+    used (auto_increment reservations).
+    """
+    watermark = _lock_watermark(db, source)
+    gaps = db.execute(
+        select(RollupGap.first_id, RollupGap.last_id, RollupGap.seen_at)
+        .where(RollupGap.source == source)
+        .order_by(RollupGap.first_id)
+    ).all()
+    filled = []
+    if gaps:
+        filled = db.execute(
+            select(*columns)
+            .where(or_(*(model.id.between(g.first_id, g.last_id) for g in gaps)))
+            .order_by(model.id)
+        ).all()
+    rows = db.execute(
+        select(*columns)
+        .where(model.id > watermark.last_id)
+        .order_by(model.id)
+        .limit(settings.ROLLUP_BATCH_SIZE)
+    ).all()
+
+    now = datetime.utcnow()
+    touched, new_gaps = _split_gaps(gaps, [row.id for row in filled])
+    # On the first run ids below the oldest row were never handed out here
+    expected = watermark.last_id + 1 if watermark.last_id else None
+    for row in rows:
+        if expected is not None and row.id > expected:
+            new_gaps.append((expected, row.id - 1, now))
+        expected = row.id + 1
+    if rows:
+        watermark.last_id = rows[-1].id
+    if touched:
+        db.execute(
+            delete(RollupGap).where(
+                RollupGap.source == source, RollupGap.first_id.in_(touched)
+            )
+        )
+    if new_gaps:
+        db.execute(
+            insert(RollupGap),
+            [
+                dict(source=source, first_id=lo, last_id=hi, seen_at=seen_at)
+                for lo, hi, seen_at in new_gaps
+            ],
+        )
+    expired = now - timedelta(seconds=settings.ROLLUP_GAP_TIMEOUT_SECONDS)
+    db.execute(
+        delete(RollupGap).where(
+            RollupGap.source == source, RollupGap.seen_at < expired
+        )
+    )
+    return filled + rows
+
+
+def _fold_transactions(db: Session) -> int:
+    rows = _next_rows(
+        db,
+        "transactions",
+        Transaction,
+        (
+            Transaction.id,
+            Transaction.user_id,
+            Transaction.merchant_id,
+            Transaction.amount,
+            Transaction.fee_amount,
+            Transaction.merchant_payout,
+            Transaction.status,
+            Transaction.created_at,
+        ),
+    )
+
+    merchants = defaultdict(lambda: [0.0, 0.0, 0.0, 0])
+    users = defaultdict(lambda: [0.0, 0])
+    for row in rows:
+        if row.created_at is None or row.status != "success":
+            continue
+        for granularity in GRANULARITIES:
+            bucket = floor_bucket(row.created_at, granularity)
+            m = merchants[(row.merchant_id, granularity, bucket)]
+            m[0] += row.fee_amount
+            m[1] += row.merchant_payout
+            m[2] += row.amount
+            m[3] += 1
+            u = users[(row.user_id, granularity, bucket)]
+            u[0] += row.amount
+            u[1] += 1
+
+    upsert_increment(
+        db,
+        MerchantRollup,
+        [
+            dict(
+                zip(MERCHANT_KEY, key),
+                fee_total=fee,
+                payout_total=payout,
+                volume=volume,
+                txn_count=count,
+            )
+            for key, (fee, payout, volume, count) in merchants.items()
+        ],
+        MERCHANT_KEY,
+    )
+    upsert_increment(
+        db,
+        UserRollup,
+        [
+            dict(
+                zip(USER_KEY, key),
+                spend=spend,
+                txn_count=count,
+                paybacks=0.0,
+                payback_count=0,
+            )
+            for key, (spend, count) in users.items()
+        ],
+        USER_KEY,
+    )
+    db.commit()
+    return len(rows)
+
+
+def _fold_paybacks(db: Session) -> int:
+    rows = _next_rows(
+        db,
+        "paybacks",
+        Payback,
+        (Payback.id, Payback.user_id, Payback.amount, Payback.created_at),
+    )
+
+    users = defaultdict(lambda: [0.0, 0])
+    for row in rows:
+        if row.created_at is None:
+            continue
+        for granularity in GRANULARITIES:
+            bucket = floor_bucket(row.created_at, granularity)
+            u = users[(row.user_id, granularity, bucket)]
+            u[0] += row.amount
+            u[1] += 1
+
+    upsert_increment(
+        db,
+        UserRollup,
+        [
+            dict(
+                zip(USER_KEY, key),
+                spend=0.0,
+                txn_count=0,
+                paybacks=paid,
+                payback_count=count,
+            )
+            for key, (paid, count) in users.items()
+        ],
+        USER_KEY,
+    )
+    db.commit()
+    return len(rows)
+
+
+def refresh_rollups(db: Session) -> dict:
+    """Fold every committed ledger row not folded yet into the rollups."""
+    folded = {}
+    sources = (("transactions", _fold_transactions), ("paybacks", _fold_paybacks))
+    for source, fold in sources:
+        total = 0
+        while True:
+            count = fold(db)
+            total += count
+            if count < settings.ROLLUP_BATCH_SIZE:
+                break
+        folded[source] = total
+    return folded
+
+
+def run_rollup_job() -> None:
+    with SessionLocal() as db:
+        refresh_rollups(db)
+
+
+def _bucket_filter(model, start: Optional[datetime], end: Optional[datetime]):
+    """Cover [start, end) with day buckets plus hour buckets at the ragged edges."""
+    if start is None and end is None:
+        return model.granularity == "day"
+
+    start = floor_bucket(start, "hour") if start else None
+    end = floor_bucket(end, "hour") if end else None
+    day_from = _ceil_day(start) if start else None
+    day_to = floor_bucket(end, "day") if end else None
+
+    def hours(lo, hi):
+        conds = [model.granularity == "hour"]
+        if lo is not None:
+            conds.append(model.bucket_start >= lo)
+        if hi is not None:
+            conds.append(model.bucket_start < hi)
+        return and_(*conds)
+
+    if day_from is not None and day_to is not None and day_from >= day_to:
+        return hours(start, end)
+
+    days = [model.granularity == "day"]
+    if day_from is not None:
+        days.append(model.bucket_start >= day_from)
+    if day_to is not None:
+        days.append(model.bucket_start < day_to)
+    parts = [and_(*days)]
+    if start is not None:
+        parts.append(hours(start, day_from))
+    if end is not None:
+        parts.append(hours(day_to, end))
+    return or_(*parts)
+
+
+def _created_at_filter(model, start: Optional[datetime], end: Optional[datetime]):
+    conds = []
+    if start is not None:
+        conds.append(model.created_at >= floor_bucket(start, "hour"))
+    if end is not None:
+        conds.append(model.created_at < floor_bucket(end, "hour"))
+    return conds
+
+
+def merchant_fee_total(
+    db: Session,
+    merchant_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> float:
+    rolled = (
+        db.query(func.sum(MerchantRollup.fee_total))
+        .filter(
+            MerchantRollup.merchant_id == merchant_id,
+            _bucket_filter(MerchantRollup, start, end),
+        )
+        .scalar()
+        or 0.0
+    )
+    # Rows not folded yet are read directly
+    pending = (
+        db.query(func.sum(Transaction.fee_amount))
+        .filter(
+            _unfolded(
+                Transaction, "transactions", get_watermark(db, "transactions")
+            ),
+            Transaction.merchant_id == merchant_id,
+            Transaction.status == "success",
+            *_created_at_filter(Transaction, start, end),
+        )
+        .scalar()
+        or 0.0
+    )
+    return rolled + pending
+
+
+def _bucket_range(model, start, end) -> list:
+    conds = []
+    if start is not None:
+        conds.append(model.bucket_start >= start)
+    if end is not None:
+        conds.append(model.bucket_start < end)
+    return conds
+
+
+def _pending_range(model, start, end) -> list:
+    conds = []
+    if start is not None:
+        conds.append(model.created_at >= start)
+    if end is not None:
+        conds.append(model.created_at < end)
+    return conds
+
+
+def merchant_breakdown(
+    db: Session,
+    merchant_id: int,
+    granularity: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[dict]:
+    # Whole buckets only: a partial last bucket would be reported as a full one
+    start = floor_bucket(start, granularity) if start else None
+    end = floor_bucket(end, granularity) if end else None
+    buckets = defaultdict(lambda: [0.0, 0.0, 0.0, 0])
+    rolled = db.query(MerchantRollup).filter(
+        MerchantRollup.merchant_id == merchant_id,
+        MerchantRollup.granularity == granularity,
+        *_bucket_range(MerchantRollup, start, end),
+    )
+    for r in rolled:
+        buckets[r.bucket_start] = [r.fee_total, r.payout_total, r.volume, r.txn_count]
+    # Rows not folded yet are read directly, as in merchant_fee_total
+    pending = db.execute(
+        select(
+            Transaction.created_at,
+            Transaction.fee_amount,
+            Transaction.merchant_payout,
+            Transaction.amount,
+        )
+        .where(
+            _unfolded(
+                Transaction, "transactions", get_watermark(db, "transactions")
+            ),
+            Transaction.merchant_id == merchant_id,
+            Transaction.status == "success",
+            *_pending_range(Transaction, start, end),
+        )
+        .execution_options(yield_per=PENDING_BATCH)
+    )
+    for created_at, fee, payout, amount in pending:
+        b = buckets[floor_bucket(created_at, granularity)]
+        b[0] += fee
+        b[1] += payout
+        b[2] += amount
+        b[3] += 1
+    return [
+        {
+            "bucket_start": bucket_start,
+            "fee_collected": fee,
+            "merchant_payout": payout,
+            "volume": volume,
+            "transactions": count,
+        }
+        for bucket_start, (fee, payout, volume, count) in sorted(buckets.items())
+    ]
+
+
+def user_activity(
+    db: Session,
+    user_id: int,
+    granularity: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[dict]:
+    start = floor_bucket(start, granularity) if start else None
+    end = floor_bucket(end, granularity) if end else None
+    buckets = defaultdict(lambda: [0.0, 0, 0.0, 0])
+    rolled = db.query(UserRollup).filter(
+        UserRollup.user_id == user_id,
+        UserRollup.granularity == granularity,
+        *_bucket_range(UserRollup, start, end),
+    )
+    for r in rolled:
+        buckets[r.bucket_start] = [r.spend, r.txn_count, r.paybacks, r.payback_count]
+    spent = db.execute(
+        select(Transaction.created_at, Transaction.amount)
+        .where(
+            _unfolded(
+                Transaction, "transactions", get_watermark(db, "transactions")
+            ),
+            Transaction.user_id == user_id,
+            Transaction.status == "success",
+            *_pending_range(Transaction, start, end),
+        )
+        .execution_options(yield_per=PENDING_BATCH)
+    )
+    for created_at, amount in spent:
+        b = buckets[floor_bucket(created_at, granularity)]
+        b[0] += amount
+        b[1] += 1
+    paid = db.execute(
+        select(Payback.created_at, Payback.amount)
+        .where(
+            _unfolded(Payback, "paybacks", get_watermark(db, "paybacks")),
+            Payback.user_id == user_id,
+            *_pending_range(Payback, start, end),
+        )
+        .execution_options(yield_per=PENDING_BATCH)
+    )
+    for created_at, amount in paid:
+        b = buckets[floor_bucket(created_at, granularity)]
+        b[2] += amount
+        b[3] += 1
+    return [
+        {
+            "bucket_start": bucket_start,
+            "spend": spend,
+            "transactions": txn_count,
+            "paybacks": paybacks,
+            "payback_count": payback_count,
+        }
+        for bucket_start, (spend, txn_count, paybacks, payback_count) in sorted(
+            buckets.items()
+        )
+    ]
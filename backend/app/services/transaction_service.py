@@ -1,58 +1,252 @@
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Iterator, List, Optional
 
+from app.core import idempotency, metrics, report_cache
+from app.core.database import SessionLocal, run_with_lock_retry
+from app.core.pagination import DEFAULT_PAGE_SIZE, columns, paginate
+from app.models.merchant import Merchant
 from app.models.transaction import Transaction
-from app.schemas.transaction import TransactionCreate, TransactionStatusResponse
-from app.services.user_service import get_user_by_name, calculate_available_credit
-from app.services.merchant_service import get_merchant_by_name
+from app.models.user import User
+from app.models.user_balance import UserBalance
+from app.schemas.transaction import (
+    TransactionCreate,
+    TransactionResponse,
+    TransactionStatusResponse,
+)
+from app.services import event_service, rejection_service
+from app.services.user_service import get_user_balance, apply_purchase, reserve_credit
+from app.services.directory_service import resolve_user, resolve_merchant
+
+EXPORT_COLUMNS = (
+    "id",
+    "user_id",
+    "merchant_id",
+    "amount",
+    "fee_amount",
+    "merchant_payout",
+    "status",
+    "rejection_reason",
+    "created_at",
+)
+# Rows fetched from the server-side cursor (and written out) per chunk
+EXPORT_BATCH = 5000
 
 
 def create_transaction(
     db: Session, data: TransactionCreate
 ) -> TransactionStatusResponse:
-    user = get_user_by_name(db, data.user_name)
-    merchant = get_merchant_by_name(db, data.merchant_name)
-
-    available = calculate_available_credit(db, user)
-
-    if data.amount > available:
-        txn = Transaction(
-            user_id=user.id,
-            merchant_id=merchant.id,
-            amount=data.amount,
-            fee_amount=0.0,
-            merchant_payout=0.0,
-            status="rejected",
-            rejection_reason="credit limit",
-        )
-        db.add(txn)
+    user = resolve_user(db, data.user_name)
+    merchant = resolve_merchant(db, data.merchant_name)
+    return run_with_lock_retry(db, _authorize, user.id, merchant, data.amount)
+
+
+def _authorize(
+    db: Session, user_id: int, merchant, amount: float
+) -> TransactionStatusResponse:
+    if not reserve_credit(db, user_id, amount):
+        response = TransactionStatusResponse(status="rejected", reason="credit limit")
+        idempotency.record(db, response)
+        # Commits only a balance row reserve_credit may have created
         db.commit()
-        return TransactionStatusResponse(status="rejected", reason="credit limit")
+        rejection_service.record(user_id, merchant.id, amount, "credit limit")
+        metrics.TRANSACTIONS.inc("rejected", "credit limit")
+        return response
 
-    fee_amount = round((data.amount * merchant.fee_percentage) / 100, 2)
-    merchant_payout = round(data.amount - fee_amount, 2)
+    fee_amount = round((amount * merchant.fee_percentage) / 100, 2)
+    merchant_payout = round(amount - fee_amount, 2)
 
     txn = Transaction(
-        user_id=user.id,
+        user_id=user_id,
         merchant_id=merchant.id,
-        amount=data.amount,
+        amount=amount,
         fee_amount=fee_amount,
         merchant_payout=merchant_payout,
         status="success",
     )
     db.add(txn)
+    event_service.record(
+        db,
+        [
+            event_service.event(
+                event_service.PURCHASE,
+                user_id,
+                merchant.id,
+                amount,
+                fee_amount=fee_amount,
+                merchant_payout=merchant_payout,
+            )
+        ],
+    )
+    response = TransactionStatusResponse(status="success")
+    idempotency.record(db, response)
+    db.commit()
+    report_cache.invalidate(report_cache.DUES, report_cache.merchant_tag(merchant.id))
+    metrics.TRANSACTIONS.inc("success", "")
+    return response
+
+
+def create_transactions_batch(
+    db: Session, items: List[TransactionCreate]
+) -> List[TransactionStatusResponse]:
+    users = {
+        name: (user_id, credit_limit)
+        for name, user_id, credit_limit in db.query(
+            User.name, User.id, User.credit_limit
+        ).filter(User.name.in_({item.user_name for item in items}))
+    }
+    merchants = {
+        name: (merchant_id, fee_percentage)
+        for merchant_id, name, fee_percentage in db.query(
+            Merchant.id, Merchant.name, Merchant.fee_percentage
+        ).filter(Merchant.name.in_({item.merchant_name for item in items}))
+    }
+    # Lock in user_id order so concurrent batches cannot deadlock each other
+    balances = {
+        balance.user_id: balance
+        for balance in db.query(UserBalance)
+        .filter(UserBalance.user_id.in_({user_id for user_id, _ in users.values()}))
+        .order_by(UserBalance.user_id)
+        .with_for_update()
+    }
+
+    rows = []
+    declined = []
+    results = []
+    # Items are applied in request order so each user's credit check sees
+    # the purchases accepted before it in the same batch.
+    for item in items:
+        if item.user_name not in users:
+            results.append(
+                TransactionStatusResponse(status="rejected", reason="unknown user")
+            )
+            continue
+        if item.merchant_name not in merchants:
+            results.append(
+                TransactionStatusResponse(status="rejected", reason="unknown merchant")
+            )
+            continue
+        user_id, credit_limit = users[item.user_name]
+        merchant_id, fee_percentage = merchants[item.merchant_name]
+
+        balance = balances.get(user_id)
+        if balance is None:
+            balance = balances[user_id] = get_user_balance(db, user_id)
+
+        if item.amount > balance.available_credit:
+            declined.append((user_id, merchant_id, item.amount))
+            results.append(
+                TransactionStatusResponse(status="rejected", reason="credit limit")
+            )
+            continue
+
+        fee_amount = round((item.amount * fee_percentage) / 100, 2)
+        rows.append(
+            dict(
+                user_id=user_id,
+                merchant_id=merchant_id,
+                amount=item.amount,
+                fee_amount=fee_amount,
+                merchant_payout=round(item.amount - fee_amount, 2),
+                status="success",
+                rejection_reason=None,
+            )
+        )
+        apply_purchase(balance, item.amount, credit_limit)
+        results.append(TransactionStatusResponse(status="success"))
+
+    if rows:
+        db.execute(insert(Transaction), rows)
+        event_service.record(
+            db,
+            [
+                event_service.event(
+                    event_service.PURCHASE,
+                    row["user_id"],
+                    row["merchant_id"],
+                    row["amount"],
+                    fee_amount=row["fee_amount"],
+                    merchant_payout=row["merchant_payout"],
+                )
+                for row in rows
+            ],
+        )
     db.commit()
-    return TransactionStatusResponse(status="success")
+    for user_id, merchant_id, amount in declined:
+        rejection_service.record(user_id, merchant_id, amount, "credit limit")
+    charged = {report_cache.merchant_tag(row["merchant_id"]) for row in rows}
+    if charged:
+        report_cache.invalidate(report_cache.DUES, *charged)
+    for result in results:
+        metrics.TRANSACTIONS.inc(result.status, result.reason or "")
+    return results
 
 
-def get_user_transactions(db: Session, user_id: int) -> List[Transaction]:
-    return (
-        db.query(Transaction)
-        .filter(Transaction.user_id == user_id)
-        .order_by(Transaction.created_at.desc())
-        .all()
+def get_user_transactions(
+    db: Session,
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> dict:
+    query = db.query(*columns(Transaction, TransactionResponse)).filter(
+        Transaction.user_id == user_id
     )
+    return paginate(query, Transaction, cursor, limit)
+
+
+def get_all_transactions(
+    db: Session, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+) -> dict:
+    query = db.query(*columns(Transaction, TransactionResponse))
+    return paginate(query, Transaction, cursor, limit)
+
+
+def _encode_ndjson(rows) -> str:
+    lines = []
+    for row in rows:
+        record = dict(zip(EXPORT_COLUMNS, row))
+        if record["created_at"] is not None:
+            record["created_at"] = record["created_at"].isoformat()
+        lines.append(json.dumps(record))
+    return "\n".join(lines) + "\n"
+
+
+def _encode_csv(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def export_transactions(
+    fmt: str = "ndjson",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    merchant_id: Optional[int] = None,
+    status: Optional[str] = None,
+) -> Iterator[str]:
+    stmt = select(*(getattr(Transaction, c) for c in EXPORT_COLUMNS))
+    if start is not None:
+        stmt = stmt.where(Transaction.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(Transaction.created_at < end)
+    if user_id is not None:
+        stmt = stmt.where(Transaction.user_id == user_id)
+    if merchant_id is not None:
+        stmt = stmt.where(Transaction.merchant_id == merchant_id)
+    if status is not None:
+        stmt = stmt.where(Transaction.status == status)
+    stmt = stmt.order_by(Transaction.id).execution_options(yield_per=EXPORT_BATCH)
 
+    encode = _encode_csv if fmt == "csv" else _encode_ndjson
+    if fmt == "csv":
+        yield _encode_csv([EXPORT_COLUMNS])
 
-def get_all_transactions(db: Session) -> List[Transaction]:
-    return db.query(Transaction).order_by(Transaction.created_at.desc()).all()
+    # The export outlives the request-scoped session, so it owns its own
+    with SessionLocal() as db:
+        for rows in db.execute(stmt).partitions():
+            yield encode(rows)
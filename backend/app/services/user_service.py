@@ -1,11 +1,18 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select, update
 from fastapi import HTTPException, status
-from typing import List
+from typing import List, Optional
 
+from app.core.pagination import DEFAULT_PAGE_SIZE, columns, paginate
 from app.models.user import User
+from app.models.user_balance import UserBalance
 from app.models.transaction import Transaction
 from app.models.payback import Payback
+from app.schemas.user import UserResponse
+from app.services import rollup_service
+
+# Rows fetched per round trip when streaming report queries
+REPORT_STREAM_BATCH = 1000
 
 
 def get_user_by_name(db: Session, name: str) -> User:
@@ -22,11 +29,14 @@ def get_user_by_id(db: Session, user_id: int) -> User:
     return user
 
 
-def get_all_users(db: Session) -> List[User]:
-    return db.query(User).all()
+def get_all_users(
+    db: Session, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+) -> dict:
+    query = db.query(*columns(User, UserResponse))
+    return paginate(query, User, cursor, limit, descending=False)
 
 
-def calculate_user_dues(db: Session, user_id: int) -> float:
+def sum_user_dues_from_history(db: Session, user_id: int) -> float:
     total_txn = (
         db.query(func.sum(Transaction.amount))
         .filter(Transaction.user_id == user_id, Transaction.status == "success")
@@ -42,26 +52,137 @@ def calculate_user_dues(db: Session, user_id: int) -> float:
     return max(0.0, total_txn - total_paid)
 
 
+def _balance_from_history(db: Session, user: User) -> UserBalance:
+    # Not sum_user_dues_from_history: archived months are only in the rollups
+    dues = max(0.0, rollup_service.user_net_spend(db, user.id))
+    # By id, not user=: the relationship would cascade it into the session
+    return UserBalance(
+        user_id=user.id,
+        dues=dues,
+        available_credit=max(0.0, user.credit_limit - dues),
+    )
+
+
+def rebuild_user_balance(db: Session, user: User) -> UserBalance:
+    balance = _balance_from_history(db, user)
+    db.add(balance)
+    return balance
+
+
+def get_user_balance(
+    db: Session, user_id: int, for_update: bool = False
+) -> UserBalance:
+    query = db.query(UserBalance).filter(UserBalance.user_id == user_id)
+    if for_update:
+        query = query.with_for_update().populate_existing()
+    balance = query.first()
+    if balance is None:
+        # Rows created before the balance table existed are rebuilt from history
+        balance = rebuild_user_balance(db, get_user_by_id(db, user_id))
+        db.flush()
+    return balance
+
+
+def read_user_balance(db: Session, user_id: int) -> UserBalance:
+    """Like ``get_user_balance`` but never writes, so it can run on a replica.
+
+    A missing row is computed from history without being stored; the next
+    write to the user rebuilds it on the primary.
+    """
+    balance = db.query(UserBalance).filter(UserBalance.user_id == user_id).first()
+    if balance is None:
+        balance = _balance_from_history(db, get_user_by_id(db, user_id))
+    return balance
+
+
+def _reserve(db: Session, user_id: int, amount: float) -> bool:
+    credit_limit = select(User.credit_limit).where(User.id == user_id).scalar_subquery()
+    result = db.execute(
+        update(UserBalance)
+        .where(
+            UserBalance.user_id == user_id,
+            credit_limit - UserBalance.dues >= amount,
+        )
+        # available_credit first: MySQL evaluates SET left to right with the
+        # new values, so both columns must be computed from the old dues
+        .ordered_values(
+            (UserBalance.available_credit, credit_limit - UserBalance.dues - amount),
+            (UserBalance.dues, UserBalance.dues + amount),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def reserve_credit(db: Session, user_id: int, amount: float) -> bool:
+    """Move ``amount`` from available credit to dues if it fits.
+
+    The check and the update are one conditional UPDATE, so concurrent
+    purchases by the same user serialize on that single row lock and can
+    never overspend. The lock is held only until the caller commits.
+    """
+    if _reserve(db, user_id, amount):
+        return True
+    exists = db.query(UserBalance.user_id).filter(UserBalance.user_id == user_id)
+    if exists.first() is None:
+        get_user_balance(db, user_id)
+        return _reserve(db, user_id, amount)
+    return False
+
+
+def _set_dues(balance: UserBalance, dues: float, credit_limit: float) -> None:
+    balance.dues = dues
+    # Derived from dues rather than accumulated, so the two cannot drift apart
+    balance.available_credit = max(0.0, credit_limit - dues)
+
+
+def apply_purchase(balance: UserBalance, amount: float, credit_limit: float) -> None:
+    _set_dues(balance, balance.dues + amount, credit_limit)
+
+
+def apply_payback(balance: UserBalance, amount: float, credit_limit: float) -> None:
+    paid = min(amount, balance.dues)
+    _set_dues(balance, max(0.0, balance.dues - paid), credit_limit)
+
+
+def calculate_user_dues(db: Session, user_id: int) -> float:
+    return read_user_balance(db, user_id).dues
+
+
+def count_user_transactions(db: Session, user_id: int) -> int:
+    return (
+        db.query(func.count())
+        .select_from(Transaction)
+        .filter(Transaction.user_id == user_id, Transaction.status == "success")
+        .scalar()
+    )
+
+
 def calculate_available_credit(db: Session, user: User) -> float:
-    dues = calculate_user_dues(db, user.id)
-    return max(0.0, user.credit_limit - dues)
+    return read_user_balance(db, user.id).available_credit
 
 
 def get_users_at_credit_limit(db: Session) -> List[str]:
-    users = db.query(User).all()
-    result = []
-    for user in users:
-        dues = calculate_user_dues(db, user.id)
-        if dues >= user.credit_limit:
-            result.append(user.name)
-    return result
+    dues = func.coalesce(UserBalance.dues, 0.0)
+    rows = db.execute(
+        select(User.name)
+        .outerjoin(UserBalance, UserBalance.user_id == User.id)
+        .where(dues >= User.credit_limit)
+        .execution_options(yield_per=REPORT_STREAM_BATCH)
+    )
+    return [name for (name,) in rows]
 
 
 def get_total_dues(db: Session) -> dict:
-    users = db.query(User).all()
+    rows = db.execute(
+        select(User.name, UserBalance.dues)
+        .join(UserBalance, UserBalance.user_id == User.id)
+        .where(UserBalance.dues > 0)
+        .execution_options(yield_per=REPORT_STREAM_BATCH)
+    )
     details = {}
-    for user in users:
-        dues = calculate_user_dues(db, user.id)
-        if dues > 0:
-            details[user.name] = dues
-    return {"total": sum(details.values()), "details": details}
+    total = 0.0
+    for name, dues in rows:
+        details[name] = dues
+        total += dues
+    return {"total": total, "details": details}
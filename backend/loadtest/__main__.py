@@ -0,0 +1,224 @@
+"""HTTP load test for the Pay Later API.
+
+Boots ``app.main:app`` under uvicorn against a local database stand-in,
+seeds it, drives a weighted mix of routes at a fixed concurrency and
+writes per-route latency percentiles and RPS as JSON.
+
+Usage (from backend/):
+    pip install -r requirements-dev.txt
+    python -m loadtest --fresh --users 2000 --transactions 100000 --out run.json
+    python -m loadtest --hot-user --mix purchase=1 --concurrency 64
+    python -m loadtest --database-url mysql+pymysql://u:p@localhost/paylater_load
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m loadtest", description=__doc__.split("\n")[0]
+    )
+    parser.add_argument("--database-url", default="sqlite:///loadtest.db")
+    parser.add_argument(
+        "--fresh", action="store_true", help="drop, recreate and seed the schema"
+    )
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--merchants", type=int, default=50)
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--paybacks", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--mix", default=None, help="weights, e.g. purchase=40,users_me=20"
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument(
+        "--hot-user",
+        action="store_true",
+        help="send every purchase and payback to user1",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="uvicorn worker processes"
+    )
+    parser.add_argument(
+        "--async-db", action="store_true", help="set ASYNC_DB_ENABLED on the server"
+    )
+    parser.add_argument("--bcrypt-rounds", type=int, default=None)
+    parser.add_argument(
+        "--url", default=None, help="target an already-running server instead"
+    )
+    parser.add_argument(
+        "--out", default=None, help="write the JSON report here (default stdout)"
+    )
+    return parser.parse_args(argv)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_healthy(url: str, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become healthy")
+
+
+def _prepare_database(args) -> None:
+    from app.cli.seed import seed
+    from app.core.database import Base, engine
+    import app.models  # noqa: F401
+
+    if engine.dialect.name == "sqlite":
+        # WAL lets the server's readers run alongside its single writer
+        # (raw connection: the pragma cannot run inside the BEGIN the engine emits)
+        conn = engine.raw_connection()
+        try:
+            conn.cursor().execute("PRAGMA journal_mode=WAL")
+        finally:
+            conn.close()
+
+    if args.fresh:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    if args.fresh:
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            seed(
+                conn,
+                args.users,
+                args.merchants,
+                args.transactions,
+                args.paybacks,
+                seed=args.seed,
+            )
+        print(f"seeded in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+def _check_consistency() -> dict:
+    """Verify balances against the ledger and that no user exceeded their limit."""
+    from sqlalchemy import func, select
+
+    from app.core.database import SessionLocal
+    from app.models import Payback, Transaction, User, UserBalance
+
+    spent = (
+        select(Transaction.user_id, func.sum(Transaction.amount).label("total"))
+        .where(Transaction.status == "success")
+        .group_by(Transaction.user_id)
+        .subquery()
+    )
+    paid = (
+        select(Payback.user_id, func.sum(Payback.amount).label("total"))
+        .group_by(Payback.user_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            User.name,
+            User.credit_limit,
+            UserBalance.dues,
+            func.coalesce(spent.c.total, 0) - func.coalesce(paid.c.total, 0),
+        )
+        .join(UserBalance, UserBalance.user_id == User.id)
+        .outerjoin(spent, spent.c.user_id == User.id)
+        .outerjoin(paid, paid.c.user_id == User.id)
+    )
+    overspent, drifted = [], []
+    with SessionLocal() as db:
+        for name, limit, dues, ledger in db.execute(stmt):
+            if dues > limit + 1e-6:
+                overspent.append(name)
+            if abs(dues - max(0.0, ledger)) > 1e-6:
+                drifted.append(name)
+    return {"overspent_users": overspent, "balance_drift_users": drifted}
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["ROLLUP_JOB_ENABLED"] = "false"
+    if args.async_db:
+        os.environ["ASYNC_DB_ENABLED"] = "true"
+    if args.bcrypt_rounds is not None:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    sys.path.insert(0, BACKEND_DIR)
+
+    from loadtest.runner import DEFAULT_MIX, run
+
+    proc = None
+    url = args.url
+    if url is None:
+        _prepare_database(args)
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        proc = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--host", "127.0.0.1", "--port", str(port),
+                "--workers", str(args.workers), "--log-level", "warning",
+            ],
+            cwd=BACKEND_DIR,
+            env=os.environ.copy(),
+        )
+    try:
+        if proc is not None:
+            _wait_healthy(url, proc)
+        results = asyncio.run(
+            run(
+                url,
+                args.users,
+                args.merchants,
+                args.mix or DEFAULT_MIX,
+                args.concurrency,
+                args.duration,
+                args.warmup,
+                args.hot_user,
+                args.seed,
+            )
+        )
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    report = {
+        "started_at": datetime.utcnow().isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        **results,
+    }
+    if args.url is None:
+        report["consistency"] = _check_consistency()
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Compare the async database path with the threadpool path under load.
+
+Runs the HTTP load test (``python -m loadtest``) once per mode and
+concurrency level against a freshly seeded database:
+
+    threadpool: ASYNC_DB_ENABLED=false, services run in Starlette's threadpool
+    async:      ASYNC_DB_ENABLED=true, services run on an AsyncSession
+
+and prints requests/sec, error count and the worst per-route p99 for each.
+
+Usage (from backend/):
+    pip install -r requirements-dev.txt
+    python -m loadtest.bench_async --concurrency 64,256 --duration 20
+    python -m loadtest.bench_async --database-url mysql+pymysql://u:p@localhost/paylater_load
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("threadpool", "async")
+
+
+def _run(args, mode: str, concurrency: int, out: str) -> dict:
+    command = [
+        sys.executable, "-m", "loadtest", "--fresh",
+        "--database-url", args.database_url,
+        "--users", str(args.users),
+        "--transactions", str(args.transactions),
+        "--concurrency", str(concurrency),
+        "--duration", str(args.duration),
+        "--workers", str(args.workers),
+        "--out", out,
+    ]
+    if args.mix:
+        command += ["--mix", args.mix]
+    if mode == "async":
+        command.append("--async-db")
+    subprocess.run(command, cwd=BACKEND_DIR, check=True)
+    with open(out) as f:
+        report = json.load(f)
+    routes = report["routes"].values()
+    return {
+        "rps": report["rps"],
+        "errors": sum(r["errors"] for r in routes),
+        "worst_p99_ms": max((r["p99_ms"] for r in routes), default=0.0),
+        "p99_ms": {key: r["p99_ms"] for key, r in report["routes"].items()},
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--database-url", default="sqlite:///bench_async.db")
+    parser.add_argument("--concurrency", default="64,256")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--mix", default=None, help="passed to the load test")
+    args = parser.parse_args(argv)
+
+    results = []
+    out = os.path.join(tempfile.mkdtemp(), "run.json")
+    for concurrency in (int(n) for n in args.concurrency.split(",")):
+        run = {"concurrency": concurrency}
+        for mode in MODES:
+            run[mode] = _run(args, mode, concurrency, out)
+        run["rps_ratio"] = round(
+            run["async"]["rps"] / max(run["threadpool"]["rps"], 1e-9), 2
+        )
+        results.append(run)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
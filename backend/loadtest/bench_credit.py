@@ -0,0 +1,148 @@
+"""Measure purchase authorization throughput and check that nobody overspends.
+
+Seeds a database, then drives ``transaction_service.create_transaction``
+from ``--threads`` threads, each with its own session, in two scenarios:
+
+    many: every purchase goes to a random seeded user
+    hot:  every purchase goes to user1, so all threads contend on one row
+
+and reports accepted/rejected/failed purchases per second. After each
+scenario every touched user's balance is checked against their credit
+limit and against the sum of their ledger rows.
+
+Usage (from backend/):
+    python -m loadtest.bench_credit --threads 16 --purchases 5000
+    python -m loadtest.bench_credit --database-url mysql+pymysql://u:p@localhost/paylater_load
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--merchants", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--purchases", type=int, default=5000, help="per scenario")
+    parser.add_argument("--max-amount", type=float, default=50.0)
+    args = parser.parse_args(argv)
+
+    if args.database_url is None:
+        path = os.path.join(tempfile.mkdtemp(), "bench_credit.db")
+        args.database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["ROLLUP_JOB_ENABLED"] = "false"
+    os.environ["BCRYPT_ROUNDS"] = "4"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from sqlalchemy import func, select
+
+    from app.cli.seed import seed
+    from app.core.database import Base, SessionLocal, engine
+    from app.models import Payback, Transaction, User, UserBalance
+    from app.schemas.transaction import TransactionCreate
+    from app.services.transaction_service import create_transaction
+
+    if engine.dialect.name == "sqlite":
+        # WAL lets readers run alongside the single writer
+        conn = engine.raw_connection()
+        try:
+            conn.cursor().execute("PRAGMA journal_mode=WAL")
+        finally:
+            conn.close()
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        seed(conn, args.users, args.merchants, 0, 0)
+
+    def check(user_ids) -> dict:
+        spent = (
+            select(func.coalesce(func.sum(Transaction.amount), 0.0))
+            .where(Transaction.user_id == User.id, Transaction.status == "success")
+            .scalar_subquery()
+        )
+        paid = (
+            select(func.coalesce(func.sum(Payback.amount), 0.0))
+            .where(Payback.user_id == User.id)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(User.name, User.credit_limit, UserBalance.dues, spent - paid)
+            .join(UserBalance, UserBalance.user_id == User.id)
+            .where(User.id.in_(user_ids))
+        )
+        overspent, drifted = [], []
+        with SessionLocal() as db:
+            for name, limit, dues, ledger in db.execute(stmt):
+                if dues > limit + 1e-6:
+                    overspent.append(name)
+                if abs(dues - max(0.0, ledger)) > 1e-6:
+                    drifted.append(name)
+        return {"overspent_users": overspent, "balance_drift_users": drifted}
+
+    def scenario(pick_user) -> dict:
+        per_thread = args.purchases // args.threads
+        outcomes = Counter()
+        touched = set()
+        lock = threading.Lock()
+
+        def worker(worker_id: int) -> None:
+            rng = random.Random(worker_id)
+            local = Counter()
+            users = set()
+            with SessionLocal() as db:
+                for _ in range(per_thread):
+                    user = pick_user(rng)
+                    users.add(user)
+                    data = TransactionCreate(
+                        user_name=f"user{user}",
+                        merchant_name=f"merchant{rng.randint(1, args.merchants)}",
+                        amount=round(rng.uniform(1, args.max_amount), 2),
+                    )
+                    try:
+                        local[create_transaction(db, data).status] += 1
+                    except Exception:
+                        db.rollback()
+                        local["failed"] += 1
+            with lock:
+                outcomes.update(local)
+                touched.update(users)
+
+        threads = [
+            threading.Thread(target=worker, args=(i,)) for i in range(args.threads)
+        ]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        seconds = time.perf_counter() - started
+        total = sum(outcomes.values())
+        return {
+            "purchases": total,
+            "seconds": round(seconds, 2),
+            "per_second": round(total / seconds, 1),
+            **{k: outcomes[k] for k in ("success", "rejected", "failed")},
+            **check(touched),
+        }
+
+    results = {
+        "database": engine.dialect.name,
+        "threads": args.threads,
+        "many": scenario(lambda rng: rng.randint(1, args.users)),
+        "hot": scenario(lambda rng: 1),
+    }
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Time the credit-limit and total-dues reports as the user base grows.
+
+For each ``--users`` size, seeds a throwaway SQLite file and runs both
+reports two ways, counting the SQL statements each issues:
+
+    per-user: load every User, then sum its transactions and paybacks (2N+1)
+    grouped:  one select joining users to user_balances, streamed
+
+The per-user path is skipped above ``--per-user-max`` users.
+
+Usage (from backend/):
+    python -m loadtest.bench_reports --users 10000,100000,1000000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def _timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--users", default="10000,100000,1000000")
+    parser.add_argument("--transactions-per-user", type=int, default=2)
+    parser.add_argument("--per-user-max", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'unused.db')}"
+    os.environ["BCRYPT_ROUNDS"] = "4"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import Session
+
+    from app.cli.seed import seed
+    from app.core.database import Base
+    from app.models import User
+    from app.services import user_service
+
+    def per_user_total_dues(db):
+        details = {}
+        for user in db.query(User).all():
+            dues = user_service.sum_user_dues_from_history(db, user.id)
+            if dues > 0:
+                details[user.name] = dues
+        return {"total": sum(details.values()), "details": details}
+
+    def per_user_at_limit(db):
+        return [
+            user.name
+            for user in db.query(User).all()
+            if user_service.sum_user_dues_from_history(db, user.id)
+            >= user.credit_limit
+        ]
+
+    paths = {
+        "total_dues": {
+            "per_user": per_user_total_dues,
+            "grouped": user_service.get_total_dues,
+        },
+        "users_at_limit": {
+            "per_user": per_user_at_limit,
+            "grouped": user_service.get_users_at_credit_limit,
+        },
+    }
+
+    results = []
+    for users in (int(n) for n in args.users.split(",")):
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, f'{users}.db')}")
+        Base.metadata.create_all(engine)
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            seed(conn, users, 50, users * args.transactions_per_user, users // 2)
+        run = {"users": users, "seed_s": round(time.perf_counter() - started, 1)}
+
+        statements = [0]
+
+        def count(*_):
+            statements[0] += 1
+
+        event.listen(engine, "before_cursor_execute", count)
+        for report, fns in paths.items():
+            for name, fn in fns.items():
+                if name == "per_user" and users > args.per_user_max:
+                    run[f"{report}_{name}"] = "skipped"
+                    continue
+
+                def once():
+                    with Session(engine) as db:
+                        fn(db)
+
+                statements[0] = 0
+                once()
+                queries = statements[0]
+                seconds = _timed(once, args.repeat)
+                run[f"{report}_{name}"] = {
+                    "queries": queries,
+                    "median_ms": round(seconds * 1000, 1),
+                }
+        event.remove(engine, "before_cursor_execute", count)
+        engine.dispose()
+        results.append(run)
+        print(json.dumps(run), file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from app.cli.seed import PASSWORD
+
+DEFAULT_MIX = (
+    "purchase=40,payback=10,users_me=15,list_transactions=8,my_transactions=8,"
+    "report_fee=5,report_dues=5,report_total_dues=2,report_users_at_limit=2,"
+    "login=5"
+)
+
+
+class Workload:
+    """Issues one randomly chosen operation per call against a seeded database."""
+
+    def __init__(self, users: int, merchants: int, hot_user: bool, rng):
+        self.users = users
+        self.merchants = merchants
+        self.hot_user = hot_user
+        self.rng = rng
+
+    def _user(self) -> str:
+        return "user1" if self.hot_user else f"user{self.rng.randint(1, self.users)}"
+
+    def _merchant(self) -> str:
+        return f"merchant{self.rng.randint(1, self.merchants)}"
+
+    def request(self, op: str):
+        """Return (route, method, path, json body) for an operation name."""
+        if op == "login":
+            n = self.rng.randint(1, self.users)
+            body = {"email": f"user{n}@seed.local", "password": PASSWORD}
+            return "/auth/login", "POST", "/auth/login", body
+        if op == "purchase":
+            body = {
+                "user_name": self._user(),
+                "merchant_name": self._merchant(),
+                "amount": round(self.rng.uniform(1, 150), 2),
+            }
+            return "/transactions/", "POST", "/transactions/", body
+        if op == "payback":
+            amount = round(self.rng.uniform(1, 200), 2)
+            body = {"user_name": self._user(), "amount": amount}
+            return "/paybacks/", "POST", "/paybacks/", body
+        if op == "users_me":
+            return "/users/me", "GET", "/users/me", None
+        if op == "list_transactions":
+            return "/transactions/", "GET", "/transactions/?limit=50", None
+        if op == "my_transactions":
+            return "/transactions/my", "GET", "/transactions/my?limit=50", None
+        if op == "report_fee":
+            path = f"/reports/fee/{self._merchant()}"
+            return "/reports/fee/{merchant_name}", "GET", path, None
+        if op == "report_dues":
+            path = f"/reports/dues/{self._user()}"
+            return "/reports/dues/{user_name}", "GET", path, None
+        if op == "report_total_dues":
+            return "/reports/total-dues", "GET", "/reports/total-dues", None
+        if op == "report_users_at_limit":
+            path = "/reports/users-at-credit-limit"
+            return path, "GET", path, None
+        raise ValueError(f"Unknown operation '{op}'")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        op, _, weight = part.partition("=")
+        weights[op.strip()] = float(weight or 1)
+    return weights
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = round(pct / 100 * len(sorted_values))
+    index = max(0, min(len(sorted_values) - 1, rank - 1))
+    return sorted_values[index]
+
+
+async def _login(client: httpx.AsyncClient, user: int) -> str:
+    response = await client.post(
+        "/auth/login",
+        json={"email": f"user{user}@seed.local", "password": PASSWORD},
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run(
+    base_url: str,
+    users: int,
+    merchants: int,
+    mix: str,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    hot_user: bool,
+    seed: int,
+) -> dict:
+    weights = parse_mix(mix)
+    ops, op_weights = list(weights), list(weights.values())
+    latencies = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60)
+    async with client:
+        # A small pool of sessions so steady-state traffic is not all bcrypt
+        session_users = random.Random(seed).sample(range(1, users + 1), min(users, 16))
+        tokens = [await _login(client, n) for n in session_users]
+
+        recording = False
+        deadline = time.perf_counter() + warmup + duration
+
+        async def worker(worker_id: int) -> None:
+            rng = random.Random(seed * 1000 + worker_id)
+            workload = Workload(users, merchants, hot_user, rng)
+            headers = {"Authorization": f"Bearer {rng.choice(tokens)}"}
+            while time.perf_counter() < deadline:
+                op = rng.choices(ops, op_weights)[0]
+                route, method, path, body = workload.request(op)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(
+                        method, path, json=body, headers=headers
+                    )
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+                elapsed = time.perf_counter() - started
+                if recording:
+                    key = f"{method} {route}"
+                    latencies[key].append(elapsed)
+                    statuses[key][status] += 1
+
+        tasks = [asyncio.create_task(worker(i)) for i in range(concurrency)]
+        await asyncio.sleep(warmup)
+        recording = True
+        measured_from = time.perf_counter()
+        await asyncio.gather(*tasks)
+        measured = time.perf_counter() - measured_from
+
+    routes = {}
+    for key, values in sorted(latencies.items()):
+        values.sort()
+        errors = sum(n for code, n in statuses[key].items() if code == 0 or code >= 500)
+        routes[key] = {
+            "count": len(values),
+            "errors": errors,
+            "status_codes": {str(code): n for code, n in sorted(statuses[key].items())},
+            "rps": round(len(values) / measured, 2),
+            "p50_ms": round(_percentile(values, 50) * 1000, 3),
+            "p95_ms": round(_percentile(values, 95) * 1000, 3),
+            "p99_ms": round(_percentile(values, 99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3),
+        }
+    total = sum(r["count"] for r in routes.values())
+    return {
+        "duration_s": round(measured, 3),
+        "total_requests": total,
+        "rps": round(total / measured, 2),
+        "routes": routes,
+    }
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# Settings are read at import, so point the app at a throwaway database first
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(
+    tempfile.mkdtemp(), "paylater_test.db"
+)
+os.environ["BCRYPT_ROUNDS"] = "4"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
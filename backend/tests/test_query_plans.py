@@ -0,0 +1,97 @@
+"""EXPLAIN every hot service query and fail on a full table scan.
+
+Runs against SQLite's ``EXPLAIN QUERY PLAN`` with the indexes declared on
+the models, which mirror the Alembic migrations. A ``SCAN <table>`` step
+that is not driven by an index means the query reads the whole table.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.cli.seed import seed
+from app.core.database import Base, SessionLocal, engine
+from app.core.pagination import encode_cursor
+from app.services import (
+    merchant_service,
+    payback_service,
+    rejection_service,
+    rollup_service,
+    transaction_service,
+    user_service,
+)
+
+NOW = datetime.utcnow()
+CURSOR = encode_cursor(NOW, 10**9)
+
+QUERIES = {
+    "user_dues": lambda db: user_service.sum_user_dues_from_history(db, 1),
+    "user_transactions": lambda db: user_service.count_user_transactions(db, 1),
+    "user_net_spend": lambda db: rollup_service.user_net_spend(db, 1),
+    "fee_collected": lambda db: merchant_service.calculate_fee_collected(db, 1),
+    "fee_collected_range": lambda db: merchant_service.calculate_fee_collected(
+        db, 1, NOW - timedelta(days=30), NOW
+    ),
+    "merchant_breakdown": lambda db: rollup_service.merchant_breakdown(
+        db, 1, "day", NOW - timedelta(days=30), NOW
+    ),
+    "user_activity": lambda db: rollup_service.user_activity(db, 1, "day"),
+    "my_transactions": lambda db: transaction_service.get_user_transactions(db, 1),
+    "my_transactions_next": lambda db: transaction_service.get_user_transactions(
+        db, 1, CURSOR
+    ),
+    "all_transactions": lambda db: transaction_service.get_all_transactions(db),
+    "all_transactions_next": lambda db: transaction_service.get_all_transactions(
+        db, CURSOR
+    ),
+    "user_paybacks": lambda db: payback_service.get_user_paybacks(db, 1),
+    "users": lambda db: user_service.get_all_users(db),
+    "merchants": lambda db: merchant_service.get_all_merchants(db),
+    "rejections": lambda db: rejection_service.get_rejections(db, CURSOR),
+    "user_rejections": lambda db: rejection_service.get_user_rejection_count(
+        db, "user1", NOW - timedelta(days=30), NOW
+    ),
+}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def ledger():
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        seed(conn, 50, 5, 2000, 200, days=30)
+    yield
+    Base.metadata.drop_all(engine)
+
+
+def _statements(fn):
+    """Run ``fn(db)`` and return the (statement, parameters) it executed."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with SessionLocal() as db:
+            fn(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return captured
+
+
+def _full_scans(statement, parameters):
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        details = [row[-1] for row in plan]
+    # "SCAN t USING [COVERING] INDEX ..." walks an index in order and stops at
+    # the LIMIT; a bare "SCAN t" reads every row
+    return [d for d in details if d.startswith("SCAN ") and "INDEX" not in d]
+
+
+@pytest.mark.parametrize("name", sorted(QUERIES))
+def test_no_full_table_scan(name):
+    statements = _statements(QUERIES[name])
+    assert statements, f"{name} ran no SELECT"
+    for statement, parameters in statements:
+        assert not _full_scans(statement, parameters), statement
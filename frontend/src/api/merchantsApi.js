@@ -1,7 +1,20 @@
 import client from './client';
 
-export const getMerchants = () => client.get('/merchants/');
+export const getMerchants = (cursor, limit) =>
+    client.get('/merchants/', { params: { cursor, limit } });
 export const createMerchant = (name, fee_percentage) =>
     client.post('/merchants/', { name, fee_percentage });
 export const updateMerchantFee = (name, fee_percentage) =>
     client.patch(`/merchants/${name}`, { fee_percentage });
+
+// Follows next_cursor so lists and pickers see every merchant, not just page one
+export const getAllMerchants = async () => {
+    const merchants = [];
+    let cursor;
+    do {
+        const res = await getMerchants(cursor, 500);
+        merchants.push(...res.data.items);
+        cursor = res.data.next_cursor;
+    } while (cursor);
+    return merchants;
+};
@@ -6,6 +6,12 @@ export const getMerchantFee = (merchant_name) =>
 export const getUserDues = (user_name) =>
     client.get(`/reports/dues/${user_name}`);
 
+export const getUserTransactionCount = (user_name) =>
+    client.get(`/reports/transactions/${user_name}`);
+
+export const getUserRejections = (user_name) =>
+    client.get(`/reports/rejections/${user_name}`);
+
 export const getUsersAtCreditLimit = () =>
     client.get('/reports/users-at-credit-limit');
 
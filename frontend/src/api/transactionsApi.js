@@ -1,6 +1,10 @@
 import client from './client';
 
-export const getMyTransactions = () => client.get('/transactions/my');
-export const getAllTransactions = () => client.get('/transactions/');
+export const getMyTransactions = (cursor, limit) =>
+    client.get('/transactions/my', { params: { cursor, limit } });
+export const getAllTransactions = (cursor, limit) =>
+    client.get('/transactions/', { params: { cursor, limit } });
+export const getRejections = (cursor, limit) =>
+    client.get('/transactions/rejections', { params: { cursor, limit } });
 export const createTransaction = (user_name, merchant_name, amount) =>
     client.post('/transactions/', { user_name, merchant_name, amount });
@@ -2,7 +2,7 @@ import { useEffect, useState } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import { getMe } from '../api/authApi';
 import { getMyTransactions } from '../api/transactionsApi';
-import { getUserDues } from '../api/reportsApi';
+import { getUserDues, getUserRejections, getUserTransactionCount } from '../api/reportsApi';
 import Sidebar from '../components/Sidebar';
 import StatCard from '../components/StatCard';
 
@@ -11,6 +11,8 @@ export default function Dashboard() {
     const [profile, setProfile] = useState(null);
     const [transactions, setTransactions] = useState([]);
     const [dues, setDues] = useState(0);
+    const [successCount, setSuccessCount] = useState(0);
+    const [rejectedCount, setRejectedCount] = useState(0);
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
@@ -21,10 +23,18 @@ export default function Dashboard() {
                 loginUser(localStorage.getItem('token'), meRes.data);
 
                 const txRes = await getMyTransactions();
-                setTransactions(txRes.data);
+                setTransactions(txRes.data.items);
 
-                const duesRes = await getUserDues(meRes.data.name);
+                // Counts come from the server; the list above is only the first page
+                const [duesRes, countRes, rejRes] = await Promise.all([
+                    getUserDues(meRes.data.name),
+                    getUserTransactionCount(meRes.data.name),
+                    getUserRejections(meRes.data.name),
+                ]);
                 setDues(duesRes.data.dues);
+                setSuccessCount(countRes.data.transactions);
+                // Declines are kept in the rejection log, not in /transactions
+                setRejectedCount(rejRes.data.rejections);
             } catch (e) {
                 console.error(e);
             } finally {
@@ -36,8 +46,6 @@ export default function Dashboard() {
 
     const creditUsed = dues;
     const available = profile ? Math.max(0, profile.credit_limit - creditUsed) : 0;
-    const successTxns = transactions.filter((t) => t.status === 'success');
-    const rejectedTxns = transactions.filter((t) => t.status === 'rejected');
 
     return (
         <div className="app-layout">
@@ -61,7 +69,7 @@ export default function Dashboard() {
                             <StatCard label="Credit Limit" value={`₹${profile?.credit_limit?.toFixed(2)}`} icon="🏦" color="blue" />
                             <StatCard label="Dues Owed" value={`₹${dues.toFixed(2)}`} icon="📋" color="red" />
                             <StatCard label="Available Credit" value={`₹${available.toFixed(2)}`} icon="💚" color="green" />
-                            <StatCard label="Total Transactions" value={transactions.length} icon="💳" color="purple" sub={`${successTxns.length} success · ${rejectedTxns.length} rejected`} />
+                            <StatCard label="Total Transactions" value={successCount + rejectedCount} icon="💳" color="purple" sub={`${successCount} success · ${rejectedCount} rejected`} />
                         </div>
 
                         {/* Credit Usage Bar */}
@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react';
 import Sidebar from '../components/Sidebar';
-import { getMerchants, createMerchant, updateMerchantFee } from '../api/merchantsApi';
+import { getAllMerchants, createMerchant, updateMerchantFee } from '../api/merchantsApi';
 
 export default function Merchants() {
     const [merchants, setMerchants] = useState([]);
@@ -14,8 +14,7 @@ export default function Merchants() {
 
     const fetchMerchants = async () => {
         try {
-            const res = await getMerchants();
-            setMerchants(res.data);
+            setMerchants(await getAllMerchants());
         } catch (e) {
             console.error(e);
         } finally {
@@ -1,12 +1,13 @@
 import { useEffect, useState } from 'react';
 import Sidebar from '../components/Sidebar';
-import { getAllTransactions, createTransaction } from '../api/transactionsApi';
-import { getMerchants } from '../api/merchantsApi';
+import { getAllTransactions, getRejections, createTransaction } from '../api/transactionsApi';
+import { getAllMerchants } from '../api/merchantsApi';
 import { useAuth } from '../contexts/AuthContext';
 
 export default function Transactions() {
     const { user } = useAuth();
     const [transactions, setTransactions] = useState([]);
+    const [rejections, setRejections] = useState([]);
     const [merchants, setMerchants] = useState([]);
     const [loading, setLoading] = useState(true);
     const [showForm, setShowForm] = useState(false);
@@ -16,9 +17,10 @@ export default function Transactions() {
 
     const fetchAll = async () => {
         try {
-            const [txRes, mRes] = await Promise.all([getAllTransactions(), getMerchants()]);
-            setTransactions(txRes.data);
-            setMerchants(mRes.data);
+            const [txRes, rejRes, allMerchants] = await Promise.all([getAllTransactions(), getRejections(), getAllMerchants()]);
+            setTransactions(txRes.data.items);
+            setRejections(rejRes.data.items);
+            setMerchants(allMerchants);
         } catch (e) {
             console.error(e);
         } finally {
@@ -166,6 +168,43 @@ export default function Transactions() {
                         </div>
                     )}
                 </div>
+
+                {/* Declined Attempts — kept in the rejection log, not the ledger */}
+                <div className="card-glass mt-4">
+                    <h5 className="section-title">Declined Attempts</h5>
+                    {loading ? null : rejections.length === 0 ? (
+                        <div className="empty-state">No declined attempts.</div>
+                    ) : (
+                        <div className="table-responsive">
+                            <table className="table custom-table">
+                                <thead>
+                                    <tr>
+                                        <th>#</th>
+                                        <th>User</th>
+                                        <th>Merchant</th>
+                                        <th>Amount</th>
+                                        <th>Reason</th>
+                                        <th>Date</th>
+                                    </tr>
+                                </thead>
+                                <tbody>
+                                    {rejections.map((r, i) => (
+                                        <tr key={r.id}>
+                                            <td>{i + 1}</td>
+                                            <td>User #{r.user_id}</td>
+                                            <td>Merchant #{r.merchant_id}</td>
+                                            <td>₹{r.amount.toFixed(2)}</td>
+                                            <td>
+                                                <span className="badge-status badge-danger">{r.reason}</span>
+                                            </td>
+                                            <td>{new Date(r.created_at).toLocaleDateString()}</td>
+                                        </tr>
+                                    ))}
+                                </tbody>
+                            </table>
+                        </div>
+                    )}
+                </div>
             </main>
         </div>
     );